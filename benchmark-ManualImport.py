@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import manual_import
+from carrier_cache import CarrierCatalog
+from chrome_session import ChromeSession
+from direct_submit import DirectSubmitError, DirectSubmitter, install_request_capture, learn_template, read_page_state
+from manual_import import (
+    create_statement,
+    create_team_rows,
+    fill_team,
+    fill_transaction,
+    prepare_team,
+    select_carrier,
+    submit_statement,
+    verify_statement,
+)
+from mock_ezlynx_server import default_producers, start_mock_server
+from name_resolver import NameResolver
+
+PHASES = ("resolve", "open_page", "carrier", "statement", "rows", "fill", "transaction", "verify", "submit")
+
+def sample_statement(rows, producers):
+    names = [producers[index % len(producers)] for index in range(rows)]
+    amounts = [f"{(index * 3719) % 20000 / 100 - 50:.2f}" for index in range(rows)]
+    return names, amounts
+
+def run_once(session, rows, producers, resolver, template_path=None):
+    """Time one browser run. With template_path phases["learned"] says whether the direct submission was learned."""
+    phases = {}
+
+    def timed(phase, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        phases[phase] = time.perf_counter() - start
+        return result
+
+    names, amounts = sample_statement(rows, producers)
+    report = timed("resolve", prepare_team, names, amounts, resolver)
+    driver = timed("open_page", session.acquire)
+    if template_path:
+        install_request_capture(driver)
+    timed("carrier", select_carrier, driver, "Fortegra Specialty")
+    timed("statement", create_statement, driver, f"BENCH{rows}", "Benchmark run")
+    timed("rows", create_team_rows, driver, len(report["team_list"]))
+    _, fill_results = timed("fill", fill_team, driver, report["team_list"], report["amount_list"])
+    timed("transaction", fill_transaction, driver)
+    timed("verify", verify_statement, driver, f"BENCH{rows}", [fill["name"] for fill in fill_results],
+          report["amount_list"])
+    page_state = read_page_state(driver) if template_path else None
+    timed("submit", submit_statement, driver)
+    phases["total"] = sum(phases.values())
+    if template_path:
+        phases["learned"] = learn_template(driver, page_state, f"BENCH{rows}", "Benchmark run",
+                                           report["amount_list"], template_path)
+    return phases
+
+def run_direct(submitter, rows, producers, resolver):
+    names, amounts = sample_statement(rows, producers)
+    report = prepare_team(names, amounts, resolver)
+    start = time.perf_counter()
+    submitter.submit("Fortegra Specialty", f"DIRECT{rows}", "Benchmark run", report["team_list"],
+                     report["amount_list"])
+    return time.perf_counter() - start
+
+def print_results(results):
+    columns = PHASES + ("total",) + (("direct",) if any("direct" in r["phases"] for r in results) else ())
+    header = f"{'Rows':>6} " + " ".join(f"{phase:>11}" for phase in columns)
+    print("\n" + header)
+    for result in results:
+        # A row count whose direct submission could not be learned has no direct time
+        print(f"{result['rows']:>6} " + " ".join(f"{result['phases'][phase]:>11.3f}" if phase in result["phases"]
+                                                 else f"{'-':>11}" for phase in columns))
+
+def compare_to_baseline(results, baseline_path, tolerance, min_delta=0.05):
+    """Return the (rows, phase) pairs that got slower than the baseline allows."""
+    with open(baseline_path, 'r') as file:
+        baseline = {entry["rows"]: entry["phases"] for entry in json.load(file)["results"]}
+
+    regressions = []
+    for result in results:
+        expected = baseline.get(result["rows"])
+        if expected is None:
+            continue
+        for phase, seconds in result["phases"].items():
+            allowed = expected.get(phase, seconds) * (1 + tolerance)
+            if seconds > allowed and seconds - expected[phase] > min_delta:
+                regressions.append((result["rows"], phase, expected[phase], seconds))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the import against the local mock EzLynx server.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 500, 1000])
+    parser.add_argument("--repeat", type=int, default=1, help="runs per row count; the fastest is kept")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every mock HTTP response")
+    parser.add_argument("--ui-delay", type=float, default=0.2, help="seconds the mock page takes per async step")
+    parser.add_argument("--producers", type=int, default=500, help="producer options in each row's select")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--direct", action="store_true",
+                        help="also time direct HTTP submission, learned from each browser run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    producers = default_producers(args.producers)
+    server = start_mock_server(latency=args.latency, ui_delay=args.ui_delay, producers=producers)
+    work_dir = tempfile.mkdtemp(prefix='ezlynx-bench-')
+
+    # Point the automation at the mock server and keep its state out of the real User Data
+    manual_import.ADD_STATEMENT_URL = server.add_statement_url
+    manual_import.SESSION_FILE_PATH = os.path.join(work_dir, 'session.json')
+    manual_import.carrier_catalog = CarrierCatalog(os.path.join(work_dir, 'carrierCatalog.json'))
+
+    session = ChromeSession(os.path.join(work_dir, 'profile'), headless=args.headless)
+    resolver = NameResolver([], [])
+    template_path = os.path.join(work_dir, 'directSubmitTemplate.json') if args.direct else None
+    submitter = (DirectSubmitter(template_path, manual_import.SESSION_FILE_PATH, manual_import.carrier_catalog)
+                 if args.direct else None)
+    results = []
+    try:
+        # Launch Chrome before timing, so open_page is the same reuse for every row count
+        session.acquire()
+        for rows in args.rows:
+            runs = [run_once(session, rows, producers, resolver, template_path) for _ in range(args.repeat)]
+            best = min(runs, key=lambda phases: phases["total"])
+            if args.direct:
+                if not best.pop("learned"):
+                    print(f"{rows} rows: could not learn the direct submission; no direct time.")
+                else:
+                    try:
+                        best["direct"] = min(run_direct(submitter, rows, producers, resolver)
+                                             for _ in range(args.repeat))
+                    except DirectSubmitError as e:
+                        print(f"{rows} rows: direct submission failed: {e}")
+            results.append({"rows": rows, "phases": best})
+            print(f"{rows} rows: {best['total']:.2f}s")
+    finally:
+        session.close()
+        server.shutdown()
+
+    print_results(results)
+    print(f"Chrome launch: {session.launch_seconds:.2f}s (not included above)")
+    print(f"Statements received by the mock server: {len(server.statements)}")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({"createdAt": time.time(), "latency": args.latency, "uiDelay": args.ui_delay,
+                       "results": results}, file, indent=4)
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        for rows, phase, expected, seconds in regressions:
+            print(f"Regression: {rows} rows, {phase}: {seconds:.3f}s (baseline {expected:.3f}s)")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+import time
+from name_resolver import normalize_name
+
+# Bump when the file layout changes; older catalogs are discarded on load.
+CATALOG_VERSION = 1
+# The carrier list barely changes, so it is re-scraped only after this long
+# or when a cached value is no longer offered by the page.
+CATALOG_MAX_AGE = 7 * 24 * 60 * 60
+# Memoized inputs beyond this many are evicted, least recently used first.
+MAX_RESOLVED = 500
+CARRIER_MATCH_SCORE = 80
+
+READ_OPTIONS_JS = """
+const select = document.getElementById(arguments[0]);
+return select ? Array.from(select.options).map((option) => [option.value, option.text.trim()]) : [];
+"""
+
+SELECT_VALUE_JS = """
+const select = document.getElementById(arguments[0]);
+const option = select && Array.from(select.options).find((opt) => opt.value === arguments[1]);
+if (!option) {
+    return false;
+}
+select.value = option.value;
+select.dispatchEvent(new Event('change', { bubbles: true }));
+return true;
+"""
+
+class CarrierCatalog:
+    """Carrier dropdown options cached on disk, keyed by option value.
+
+    Inputs that were resolved before are memoized by their normalized text,
+    so they select by value straight away with no scraping or fuzzy matching.
+    The page is only re-read when the catalog is stale or a cached value is
+    missing from the dropdown.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self.options = {}
+        self.resolved = {}
+        self.scraped_at = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.file_path, 'r') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error reading carrier catalog {self.file_path}: {e}")
+            return
+
+        if data.get("version") != CATALOG_VERSION:
+            print("Carrier catalog is from an older version. It will be rebuilt.")
+            return
+        self.options = data.get("options", {})
+        self.resolved = data.get("resolved", {})
+        self.scraped_at = data.get("scrapedAt", 0)
+
+    def save(self):
+        data = {"version": CATALOG_VERSION, "scrapedAt": self.scraped_at, "options": self.options,
+                "resolved": self.resolved}
+        temp_path = self.file_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as file:
+                json.dump(data, file)
+            os.replace(temp_path, self.file_path)
+        except Exception as e:
+            print(f"Error writing carrier catalog {self.file_path}: {e}")
+
+    def is_stale(self):
+        return not self.options or time.time() - self.scraped_at > CATALOG_MAX_AGE
+
+    def refresh(self, driver, dropdown_id):
+        self.options = {value: text for value, text in driver.execute_script(READ_OPTIONS_JS, dropdown_id) if value}
+        self.scraped_at = time.time()
+        # Forget memoized inputs that point at carriers the page no longer offers
+        self.resolved = {key: value for key, value in self.resolved.items() if value in self.options}
+        print(f"Refreshed carrier catalog: {len(self.options)} carriers.")
+
+    def _remember(self, key, value):
+        self.resolved.pop(key, None)
+        self.resolved[key] = value
+        while len(self.resolved) > MAX_RESOLVED:
+            del self.resolved[next(iter(self.resolved))]
+
+    def _match(self, user_input):
+        choices = {value: text for value, text in self.options.items() if not text.endswith("(private)")}
+        if not choices:
+            return None, None, 0
+        # Imported here because most selections are served from the cache and never need it
+        from fuzzywuzzy import process
+        closest_match, score, value = process.extractOne(user_input, choices)
+        print(f"Closest match: '{closest_match}' with a score of {score}")
+        return value, closest_match, score
+
+    def lookup(self, user_input):
+        """The option value for user_input from the cached catalog alone, or None. Never touches a page."""
+        with self._lock:
+            key = normalize_name(user_input)
+            value = self.resolved.get(key)
+            if value is None:
+                value, _, score = self._match(user_input)
+                if score < CARRIER_MATCH_SCORE:
+                    return None
+            self._remember(key, value)
+            return value
+
+    def select(self, driver, dropdown_id, user_input):
+        """Select the carrier closest to user_input. Returns True if one was selected."""
+        with self._lock:
+            key = normalize_name(user_input)
+            refreshed = False
+
+            value = self.resolved.get(key)
+            if value is not None:
+                if driver.execute_script(SELECT_VALUE_JS, dropdown_id, value):
+                    self._remember(key, value)
+                    print(f"Selected option: {self.options.get(value, value)} (cached)")
+                    return True
+                print("Cached carrier is no longer in the dropdown. Refreshing the catalog.")
+                self.refresh(driver, dropdown_id)
+                refreshed = True
+            elif self.is_stale():
+                self.refresh(driver, dropdown_id)
+                refreshed = True
+
+            while True:
+                value, closest_match, score = self._match(user_input)
+                if score < CARRIER_MATCH_SCORE:
+                    print(f"No suitable match found for '{user_input}'.")
+                    self.save()
+                    return False
+                if driver.execute_script(SELECT_VALUE_JS, dropdown_id, value):
+                    break
+                if refreshed:
+                    print(f"Option '{closest_match}' not found in the dropdown.")
+                    self.save()
+                    return False
+                # The cached list has drifted from the page; scrape once and match again
+                self.refresh(driver, dropdown_id)
+                refreshed = True
+
+            self._remember(key, value)
+            self.save()
+            print(f"Selected option: {closest_match}")
+            return True
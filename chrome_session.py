@@ -0,0 +1,81 @@
+import threading
+import time
+from selenium.common.exceptions import WebDriverException
+from manual_import import USER_DATA_DIR, create_driver, open_add_statement
+from run_timing import timing_span
+
+class ChromeSession:
+    """Owns one long-lived Chrome driver that is reused between runs.
+
+    acquire() health-checks the driver and resets it to the AddStatement page.
+    Chrome is only relaunched when the driver has crashed or its WebDriver
+    session is gone; an expired EzLynx login is handled in place by
+    open_add_statement.
+    """
+
+    def __init__(self, user_data_dir=USER_DATA_DIR, headless=False):
+        self.user_data_dir = user_data_dir
+        self.headless = headless
+        self.driver = None
+        self.launches = 0
+        self.reuses = 0
+        self.launch_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def is_alive(self):
+        if self.driver is None:
+            return False
+        try:
+            self.driver.execute_script("return document.readyState")
+            return True
+        except WebDriverException:
+            return False
+
+    def acquire(self, timer=None):
+        with self._lock:
+            with timing_span(timer, "driver_launch"):
+                if self.is_alive():
+                    self.reuses += 1
+                    print(f"Reusing Chrome session ({self.saved_seconds():.1f}s of startup saved so far).")
+                else:
+                    self._restart()
+            driver = self.driver
+        # Outside the lock: this can sit in wait_for_login for minutes, and
+        # close() must still be able to quit Chrome from the GUI meanwhile
+        with timing_span(timer, "login"):
+            open_add_statement(driver)
+        return driver
+
+    def _restart(self):
+        if self.driver is not None:
+            print("Chrome session is no longer responding. Restarting Chrome.")
+            self._quit()
+
+        start = time.perf_counter()
+        self.driver = create_driver(self.user_data_dir, self.headless)
+        elapsed = time.perf_counter() - start
+        self.launches += 1
+        self.launch_seconds += elapsed
+        print(f"Launched Chrome in {elapsed:.1f}s.")
+
+    def _quit(self):
+        try:
+            self.driver.quit()
+        except WebDriverException as e:
+            print(f"Error quitting Chrome: {e}")
+        self.driver = None
+
+    def saved_seconds(self):
+        if not self.launches:
+            return 0.0
+        return self.reuses * self.launch_seconds / self.launches
+
+    def report(self):
+        return (f"Chrome launched {self.launches} time(s), reused {self.reuses} time(s), "
+                f"about {self.saved_seconds():.1f}s of startup saved.")
+
+    def close(self):
+        with self._lock:
+            if self.driver is not None:
+                self._quit()
+                print(self.report())
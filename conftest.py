@@ -0,0 +1 @@
+# Lets the tests under tests/ import the scripts' modules from the repository root
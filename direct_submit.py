@@ -0,0 +1,542 @@
+import copy
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlparse
+from producer_matching import clean_option_text, match_producers
+from statement_import import format_amount, parse_amount
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+
+# Bump when the template layout changes; older templates are recaptured.
+TEMPLATE_VERSION = 2
+DATE_FORMAT = '%m/%d/%Y'
+REQUEST_TIMEOUT = 30
+# Request headers the HTTP session sets itself and that must not be replayed
+SKIPPED_HEADERS = {'cookie', 'content-length', 'host', 'origin', 'referer', 'user-agent', 'accept-encoding',
+                   'connection'}
+HIDDEN_INPUT_RE = re.compile(r'<input\b[^>]*>', re.IGNORECASE)
+ATTRIBUTE_RE = re.compile(r'(\w[\w-]*)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+# Values that identify a record or a session: replaying a captured one would
+# post under another statement, so they must be linked to where they came from
+ID_NAME_RE = re.compile(r'(id|guid|token|key)$', re.IGNORECASE)
+# Dates that are not today's in one of today_inputs' formats can't be replayed either
+DATE_NAME_RE = re.compile(r'(date|time)', re.IGNORECASE)
+DATE_VALUE_RE = re.compile(r'\b\d{1,4}[-/]\d{1,2}[-/]\d{1,4}\b|/Date\(\d+')
+ID_VALUE_RE = re.compile(r'^(\d{4,}|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})$', re.IGNORECASE)
+
+# Installed on the AddStatement page before the statement is created. It
+# records every same-origin XHR/fetch with a text body, and its response, in
+# sessionStorage so the log survives the page navigating after Add.
+CAPTURE_JS = """
+(() => {
+    const KEY = 'capturedRequests';
+    sessionStorage.setItem(KEY, '[]');
+    if (window.requestCaptureInstalled) {
+        return;
+    }
+    window.requestCaptureInstalled = true;
+
+    const load = () => JSON.parse(sessionStorage.getItem(KEY) || '[]');
+    const store = (list) => {
+        try {
+            sessionStorage.setItem(KEY, JSON.stringify(list.slice(-20)));
+        } catch (e) {
+            // Storage is full; capture is best effort
+        }
+    };
+    const record = (entry) => {
+        entry.id = String(Date.now()) + Math.random();
+        store(load().concat([entry]));
+        return entry.id;
+    };
+    const update = (id, fields) => store(load().map((entry) => (entry.id === id ? Object.assign(entry, fields) : entry)));
+    const absolute = (url) => new URL(url, location.href);
+    const wanted = (method, url, body) => method !== 'GET' && typeof body === 'string' &&
+        absolute(url).origin === location.origin;
+
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function (input, init) {
+            init = init || {};
+            const url = typeof input === 'string' ? input : input.url;
+            const method = String(init.method || (input && input.method) || 'GET').toUpperCase();
+            const promise = originalFetch.apply(this, arguments);
+            if (wanted(method, url, init.body)) {
+                const headers = {};
+                new Headers(init.headers || {}).forEach((value, name) => { headers[name] = value; });
+                const id = record({ method: method, url: absolute(url).href, headers: headers, body: init.body });
+                promise.then((response) => response.clone().text())
+                    .then((text) => update(id, { response: text }))
+                    .catch(() => {});
+            }
+            return promise;
+        };
+    }
+
+    const open = XMLHttpRequest.prototype.open;
+    const setRequestHeader = XMLHttpRequest.prototype.setRequestHeader;
+    const send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        this.captured = { method: String(method).toUpperCase(), url: absolute(url).href, headers: {} };
+        return open.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.setRequestHeader = function (name, value) {
+        if (this.captured) {
+            this.captured.headers[name.toLowerCase()] = value;
+        }
+        return setRequestHeader.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function (body) {
+        const captured = this.captured;
+        if (captured && wanted(captured.method, captured.url, body)) {
+            captured.body = body;
+            const id = record(captured);
+            this.addEventListener('loadend', () => {
+                const text = this.responseType === '' || this.responseType === 'text' ? this.responseText : '';
+                update(id, { response: text });
+            });
+        }
+        return send.apply(this, arguments);
+    };
+})();
+"""
+
+READ_CAPTURED_JS = "return JSON.parse(sessionStorage.getItem('capturedRequests') || '[]');"
+
+# Values the template needs to tell input fields apart from constants
+READ_PAGE_STATE_JS = """
+const rows = Array.from(document.querySelectorAll('#serviceTeamTable > tbody > tr'));
+const firstSelect = rows.length ? rows[0].querySelector('td:nth-child(1) > div > select') : null;
+const hiddenInputs = {};
+document.querySelectorAll('input[type=hidden][name]').forEach((input) => {
+    if (input.value) {
+        hiddenInputs[input.name] = input.value;
+    }
+});
+const carrier = document.getElementById('CarrierID');
+return {
+    url: location.href,
+    carrierValue: carrier ? carrier.value : '',
+    producers: firstSelect ? Array.from(firstSelect.options).filter((option) => option.value)
+        .map((option) => [option.value, option.text]) : [],
+    rowProducers: rows.map((row) => {
+        const select = row.querySelector('td:nth-child(1) > div > select');
+        return select ? select.value : '';
+    }),
+    hiddenInputs: hiddenInputs,
+};
+"""
+
+class DirectSubmitError(Exception):
+    """Direct submission is not possible for this statement; enter it through the browser instead.
+
+    sent is True once a request that can change data has gone out, after
+    which the statement may already be stored and must not be entered again.
+    """
+
+    def __init__(self, message, sent=False):
+        super().__init__(message)
+        self.sent = sent
+
+def install_request_capture(driver):
+    driver.execute_script(CAPTURE_JS)
+
+def read_page_state(driver):
+    return driver.execute_script(READ_PAGE_STATE_JS)
+
+def _parse_json(text):
+    try:
+        return json.loads(text)
+    except (TypeError, ValueError):
+        return None
+
+def _walk(value, path=()):
+    yield path, value
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _walk(item, path + (key,))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _walk(item, path + (index,))
+
+def _set_path(container, path, value):
+    for key in path[:-1]:
+        container = container[key]
+    container[path[-1]] = value
+
+def _get_path(container, path):
+    for key in path:
+        container = container[key]
+    return container
+
+def _is_correlatable(value):
+    # Only values distinctive enough that an equal value elsewhere is no coincidence
+    if isinstance(value, bool) or value is None:
+        return False
+    if isinstance(value, (int, float)):
+        return abs(value) >= 1000
+    return isinstance(value, str) and len(value) >= 6
+
+def today_inputs(now=None):
+    """Today's date in every format the page might post it in, most common first."""
+    now = now or datetime.now()
+    return {
+        "date": now.strftime(DATE_FORMAT),
+        "dateUnpadded": f"{now.month}/{now.day}/{now.year}",
+        "dateIso": now.strftime('%Y-%m-%d'),
+        "dateIsoTime": now.strftime('%Y-%m-%dT00:00:00'),
+        "dateIsoTimeZ": now.strftime('%Y-%m-%dT00:00:00Z'),
+        "dateIsoTimeMs": now.strftime('%Y-%m-%dT00:00:00.000Z'),
+    }
+
+def _is_date_like(name, value):
+    if isinstance(value, str) and DATE_VALUE_RE.search(value):
+        return True
+    return isinstance(name, str) and DATE_NAME_RE.search(name) is not None and _is_correlatable(value)
+
+def _like(captured, value):
+    """value in the JSON type the page used for the captured value, so numbers stay numbers."""
+    if isinstance(captured, (int, float)) and not isinstance(captured, bool):
+        try:
+            number = value if isinstance(value, Decimal) else Decimal(str(value))
+        except InvalidOperation:
+            return value
+        if isinstance(captured, int) and number == number.to_integral_value():
+            return int(number)
+        return float(number)
+    if isinstance(value, Decimal):
+        return format_amount(value)
+    return str(value)
+
+def _is_id_like(name, value):
+    return _is_correlatable(value) and (ID_VALUE_RE.match(str(value)) is not None or
+                                        (isinstance(name, str) and ID_NAME_RE.search(name) is not None))
+
+def _find_team(body, row_producers, amounts):
+    """Find the service-team array: one object per row holding the producer value and the amount."""
+    for path, value in _walk(body):
+        if not isinstance(value, list) or len(value) != len(row_producers) or not value:
+            continue
+        if not all(isinstance(item, dict) for item in value):
+            continue
+        producer_key = next((key for key in value[0]
+                             if [str(item.get(key)) for item in value] == row_producers), None)
+        amount_key = None
+        for key in value[0]:
+            try:
+                if [parse_amount(item.get(key)) for item in value] == amounts:
+                    amount_key = key
+                    break
+            except Exception:
+                continue
+        if producer_key is not None and amount_key is not None:
+            return {"path": list(path), "producerKey": producer_key, "amountKey": amount_key,
+                    "item": value[0]}
+    return None
+
+def _find_fields(body, values):
+    """Paths of every scalar in body equal to one of the named input values.
+
+    A path goes to the first name it matches, so a date that reads the same
+    padded and unpadded is only replaced once.
+    """
+    fields = {name: [] for name in values}
+    for path, value in _walk(body):
+        if isinstance(value, (dict, list)):
+            continue
+        for name, wanted in values.items():
+            if wanted not in (None, '') and str(value) == str(wanted):
+                fields[name].append(list(path))
+                break
+    return fields
+
+def _find_links(step, captured, earlier, hidden_inputs, skip_paths):
+    """Link the step's remaining distinctive values to a hidden page input or an earlier response.
+
+    Raises DirectSubmitError for an id-like or date-like value that cannot
+    be linked, rather than replaying the captured one.
+    """
+    links = []
+    needed = set()
+    targets = [("body", list(path), value) for path, value in _walk(step["body"])
+               if not isinstance(value, (dict, list)) and list(path) not in skip_paths]
+    targets += [("header", name, value) for name, value in step["headers"].items()]
+    for kind, where, value in targets:
+        if not _is_correlatable(value):
+            continue
+        source = next((["page", name] for name, hidden in hidden_inputs.items() if hidden == str(value)), None)
+        if source is None:
+            for index in reversed(earlier):
+                response = _parse_json(captured[index].get("response"))
+                path = next((list(p) for p, v in _walk(response) if not isinstance(v, (dict, list))
+                             and str(v) == str(value)), None) if response is not None else None
+                if path is not None:
+                    source = ["response", index, path]
+                    needed.add(index)
+                    break
+        if source is not None:
+            links.append({"target": [kind, where], "source": source})
+        else:
+            name = where if kind == "header" else next((key for key in reversed(where) if isinstance(key, str)), None)
+            label = where if kind == "header" else '.'.join(map(str, where))
+            if _is_id_like(name, value):
+                raise DirectSubmitError(f"{label} ({value}) looks like an id but no hidden input or earlier "
+                                        f"response supplies it, so it cannot be replayed.")
+            if _is_date_like(name, value):
+                raise DirectSubmitError(f"{label} ({value}) looks like a date that is not today's in a known "
+                                        f"format, so it cannot be replayed.")
+    return links, needed
+
+def _make_step(entry, field_values, team=None):
+    body = _parse_json(entry["body"])
+    if team is not None:
+        # The sample row is kept in the team entry; the rows are rebuilt per statement
+        _set_path(body, team["path"], [])
+    headers = {name: value for name, value in entry.get("headers", {}).items()
+               if name.lower() not in SKIPPED_HEADERS}
+    step = {"method": entry["method"], "url": entry["url"], "headers": headers, "body": body,
+            "fields": _find_fields(body, field_values)}
+    if team is not None:
+        step["team"] = team
+    return step
+
+def build_template(captured, page_state, statement_number, comment, amount_list):
+    """Turn the requests captured during one browser submission into a reusable template.
+
+    The last JSON request that carries the statement number and one entry
+    per service-team row is the submission. Statement number, comment,
+    carrier, today's date (in any of the today_inputs formats) and the team
+    rows become inputs, values that came from a hidden page input or an
+    earlier response are re-fetched on every replay, and everything else is
+    kept as captured. Raises DirectSubmitError when no such request was
+    captured, or when an id or date could not be traced.
+    """
+    amounts = [parse_amount(amount) for amount in amount_list]
+    field_values = {"statementNumber": statement_number, "comment": comment, "carrier": page_state["carrierValue"]}
+    field_values.update(today_inputs())
+
+    submission = None
+    for index in range(len(captured) - 1, -1, -1):
+        body = _parse_json(captured[index].get("body"))
+        if body is None:
+            continue
+        team = _find_team(body, page_state["rowProducers"], amounts)
+        if team is not None and any(str(value) == statement_number for _, value in _walk(body)):
+            submission = index, team
+            break
+    if submission is None:
+        raise DirectSubmitError("No JSON request with the statement and its service team was captured.")
+
+    index, team = submission
+    final = _make_step(captured[index], field_values, team)
+    skip_paths = [path for paths in final["fields"].values() for path in paths]
+    final["links"], needed = _find_links(final, captured, range(index), page_state["hiddenInputs"], skip_paths)
+    # Ids repeated on every row (the statement id, say) are linked the same way
+    row_skip = [[team["producerKey"]], [team["amountKey"]]]
+    team["links"], row_needed = _find_links({"body": team["item"], "headers": {}}, captured, range(index),
+                                            page_state["hiddenInputs"], row_skip)
+    needed |= row_needed
+
+    steps = []
+    step_numbers = {}
+    for earlier in sorted(needed):
+        if _parse_json(captured[earlier].get("body")) is None:
+            raise DirectSubmitError(f"Request {captured[earlier]['url']} needed for the submission is not JSON.")
+        step = _make_step(captured[earlier], field_values)
+        skip = [path for paths in step["fields"].values() for path in paths]
+        step["links"], _ = _find_links(step, captured, [], page_state["hiddenInputs"], skip)
+        step_numbers[earlier] = len(steps)
+        steps.append(step)
+    for link in final["links"] + team["links"]:
+        if link["source"][0] == "response":
+            link["source"][1] = step_numbers[link["source"][1]]
+    steps.append(final)
+
+    return {
+        "version": TEMPLATE_VERSION,
+        "capturedAt": time.time(),
+        "pageUrl": page_state["url"],
+        "producers": {clean_option_text(text): value for value, text in page_state["producers"]},
+        "steps": steps,
+    }
+
+def learn_template(driver, page_state, statement_number, comment, amount_list, template_path):
+    """Build and save a template from the requests captured during this submission. Returns True on success."""
+    try:
+        template = build_template(driver.execute_script(READ_CAPTURED_JS), page_state, statement_number, comment,
+                                  amount_list)
+    except DirectSubmitError as e:
+        print(f"Could not learn the direct submission request: {e}")
+        return False
+
+    temp_path = template_path + '.tmp'
+    try:
+        with open(temp_path, 'w') as file:
+            json.dump(template, file)
+        os.replace(temp_path, template_path)
+    except Exception as e:
+        print(f"Error writing direct submission template {template_path}: {e}")
+        return False
+    print(f"Learned the direct submission request ({len(template['steps'])} request(s)).")
+    return True
+
+def _linked_value(link, hidden_inputs, responses, sent=False):
+    source = link["source"]
+    try:
+        if source[0] == "page":
+            return hidden_inputs[source[1]]
+        return _get_path(responses[source[1]], source[2])
+    except (KeyError, IndexError, TypeError):
+        raise DirectSubmitError(f"Could not find the value for {link['target'][1]} in the {source[0]}.", sent)
+
+def read_hidden_inputs(html):
+    inputs = {}
+    for tag in HIDDEN_INPUT_RE.findall(html):
+        attributes = {name.lower(): double or single for name, double, single in ATTRIBUTE_RE.findall(tag)}
+        if attributes.get('type', '').lower() == 'hidden' and attributes.get('name'):
+            inputs[attributes['name']] = attributes.get('value', '')
+    return inputs
+
+class DirectSubmitter:
+    """Sends statements straight to the AddStatement endpoint through a pooled HTTP session.
+
+    Uses a template learned from one browser submission and the cookies the
+    browser saved after login. Anything unexpected raises DirectSubmitError;
+    the caller may enter the statement through the browser instead only
+    while its sent flag is False.
+    """
+
+    def __init__(self, template_path, session_file_path, carrier_catalog, pool_size=4):
+        self.template_path = template_path
+        self.session_file_path = session_file_path
+        self.carrier_catalog = carrier_catalog
+        self.pool_size = pool_size
+        self._http = None
+        self._template = None
+        self._template_mtime = None
+        self._lock = threading.Lock()
+
+    def ready(self):
+        """True when requests is installed and a template has been learned."""
+        return requests is not None and os.path.exists(self.template_path)
+
+    def reset(self):
+        # Called after the browser logs in again, so fresh cookies are loaded
+        with self._lock:
+            if self._http is not None:
+                self._http.close()
+            self._http = None
+
+    def _load_template(self):
+        mtime = os.path.getmtime(self.template_path)
+        if self._template is None or self._template_mtime != mtime:
+            with open(self.template_path, 'r') as file:
+                template = json.load(file)
+            if template.get("version") != TEMPLATE_VERSION:
+                raise DirectSubmitError("The direct submission template is from an older version.")
+            self._template, self._template_mtime = template, mtime
+        return self._template
+
+    def _session(self):
+        with self._lock:
+            if self._http is None:
+                try:
+                    with open(self.session_file_path, 'r') as file:
+                        cookies = json.load(file).get("cookies", [])
+                except (OSError, ValueError) as e:
+                    raise DirectSubmitError(f"No saved EzLynx session: {e}")
+                http = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size)
+                http.mount('https://', adapter)
+                http.mount('http://', adapter)
+                for cookie in cookies:
+                    http.cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''),
+                                     path=cookie.get('path', '/'))
+                self._http = http
+            return self._http
+
+    def _request(self, http, method, url, sent=False, **kwargs):
+        # Once this or an earlier request is not a GET, any failure may have left data behind
+        sent = sent or method.upper() != 'GET'
+        try:
+            response = http.request(method, url, timeout=REQUEST_TIMEOUT, **kwargs)
+        except requests.RequestException as e:
+            raise DirectSubmitError(f"{method} {url} failed: {e}", sent)
+        if urlparse(response.url).path != urlparse(url).path:
+            raise DirectSubmitError("The EzLynx session has expired.", sent)
+        if not response.ok:
+            raise DirectSubmitError(f"{method} {url} returned HTTP {response.status_code}.", sent)
+        return response
+
+    def _producer_values(self, template, team_list):
+        report = match_producers(team_list, list(template["producers"]))
+        missing = [name for name in team_list if name not in report["assigned"]]
+        if missing:
+            raise DirectSubmitError(f"No producer option for {', '.join(sorted(set(missing))[:5])}.")
+        return [template["producers"][report["assigned"][name]] for name in team_list]
+
+    def submit(self, carrier, statement_number, comment, team_list, amount_list):
+        """Submit one statement. Returns the parsed response of the final request."""
+        if requests is None:
+            raise DirectSubmitError("Direct submission needs the requests package (pip install requests).")
+        if not os.path.exists(self.template_path):
+            raise DirectSubmitError("No direct submission template yet; submit one statement in the browser first.")
+        template = self._load_template()
+
+        carrier_value = self.carrier_catalog.lookup(carrier)
+        if carrier_value is None:
+            raise DirectSubmitError(f"Carrier '{carrier}' is not in the carrier catalog.")
+        producer_values = self._producer_values(template, team_list)
+        inputs = {"statementNumber": statement_number, "comment": comment, "carrier": carrier_value}
+        inputs.update(today_inputs())
+
+        http = self._session()
+        # Loading the page checks the login and supplies any anti-forgery tokens
+        page = self._request(http, 'GET', template["pageUrl"])
+        hidden_inputs = read_hidden_inputs(page.text)
+
+        responses = []
+        sent = False
+        for step in template["steps"]:
+            body = copy.deepcopy(step["body"])
+            headers = dict(step["headers"])
+            for name, paths in step["fields"].items():
+                for path in paths:
+                    _set_path(body, path, _like(_get_path(body, path), inputs[name]))
+            if "team" in step:
+                team = step["team"]
+                sample = dict(team["item"])
+                for link in team["links"]:
+                    _set_path(sample, link["target"][1], _linked_value(link, hidden_inputs, responses, sent))
+                rows = []
+                for producer_value, amount in zip(producer_values, amount_list):
+                    row = dict(sample)
+                    row[team["producerKey"]] = _like(sample[team["producerKey"]], producer_value)
+                    row[team["amountKey"]] = _like(sample[team["amountKey"]], amount)
+                    rows.append(row)
+                _set_path(body, team["path"], rows)
+            for link in step["links"]:
+                kind, where = link["target"]
+                value = _linked_value(link, hidden_inputs, responses, sent)
+                if kind == "header":
+                    headers[where] = value
+                else:
+                    _set_path(body, where, value)
+
+            headers.setdefault('content-type', 'application/json')
+            response = self._request(http, step["method"], step["url"], sent, data=json.dumps(body), headers=headers)
+            sent = sent or step["method"].upper() != 'GET'
+            parsed = _parse_json(response.text)
+            if isinstance(parsed, dict) and parsed.get("success") is False:
+                raise DirectSubmitError(f"EzLynx rejected the statement: {parsed.get('error', parsed)}", sent)
+            responses.append(parsed)
+        return responses[-1]
@@ -0,0 +1,809 @@
+import os
+import json
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlparse
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import WebDriverException
+from carrier_cache import CarrierCatalog
+from direct_submit import DirectSubmitError, DirectSubmitter, install_request_capture, learn_template, read_page_state
+from name_resolver import NameResolver, aggregate_team
+from producer_matching import MATCH_THRESHOLDS, clean_option_text, match_producers
+from run_timing import append_skipped_log, timing_span
+from settings_store import SettingsStore
+from statement_import import format_amount, parse_amount
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+USER_DATA_DIR = os.path.join(SCRIPT_DIR, 'User Data')
+COMBINED_FILE_PATH = os.path.join(USER_DATA_DIR, 'combinedData.json')
+SETTINGS_DB_PATH = os.path.join(USER_DATA_DIR, 'settings.db')
+# Where older versions kept settings; imported into the database once
+LEGACY_SETTINGS_PATHS = (COMBINED_FILE_PATH, os.path.join(SCRIPT_DIR, 'combinedData.json'),
+                         os.path.abspath('combinedData.json'))
+CHROME_DRIVER_PATH = os.path.join(SCRIPT_DIR, 'chromedriver-win64', 'chromedriver.exe')
+ADD_STATEMENT_URL = 'https://app.ezlynx.com/applicantportal/Commissions/DirectBill/AddStatement'
+SESSION_FILE_PATH = os.path.join(USER_DATA_DIR, 'session.json')
+CARRIER_CATALOG_PATH = os.path.join(USER_DATA_DIR, 'carrierCatalog.json')
+RUN_LOG_PATH = os.path.join(USER_DATA_DIR, 'run_log.jsonl')
+DIRECT_TEMPLATE_PATH = os.path.join(USER_DATA_DIR, 'directSubmitTemplate.json')
+SKIPPED_LOG_PATH = os.path.join(SCRIPT_DIR, 'skipped_names.log')
+ADD_BUTTON_SELECTOR = 'button.btn.btn-primary.ng-binding'
+
+def create_user_data_directory():
+    """Create the User Data directory if it does not exist."""
+    if not os.path.exists(USER_DATA_DIR):
+        os.makedirs(USER_DATA_DIR)
+
+def is_on_add_statement(driver):
+    return driver.current_url.startswith(ADD_STATEMENT_URL)
+
+def _session_file_mtime():
+    try:
+        return os.path.getmtime(SESSION_FILE_PATH)
+    except OSError:
+        return None
+
+def logged_in_here_or_elsewhere():
+    """Wait condition: this browser reached AddStatement, or another one saved a session it could restore.
+
+    With a worker pool every worker waits for a login; the first to log in
+    saves session.json and the others pick it up instead of waiting on.
+    """
+    seen = {"mtime": _session_file_mtime()}
+
+    def condition(driver):
+        if is_on_add_statement(driver):
+            return True
+        mtime = _session_file_mtime()
+        if mtime is None or mtime == seen["mtime"]:
+            return False
+        seen["mtime"] = mtime
+        if restore_auth_state(driver):
+            print("Restored the session saved by another login.")
+            return True
+        return False
+    return condition
+
+def wait_for_login(driver):
+    """Wait for the user to log in, until EzLynx lands on the AddStatement page."""
+    print('Please log in. Waiting for the AddStatement page.')
+    timed_wait(driver, "login", logged_in_here_or_elsewhere(), "login")
+
+# Injected before any page script runs so the SPA boots with the saved storage.
+RESTORE_STORAGE_JS = """
+(() => {
+    const saved = %s;
+    if (location.origin !== saved.origin) {
+        return;
+    }
+    for (const [key, value] of Object.entries(saved.local)) {
+        if (localStorage.getItem(key) === null) localStorage.setItem(key, value);
+    }
+    for (const [key, value] of Object.entries(saved.session)) {
+        if (sessionStorage.getItem(key) === null) sessionStorage.setItem(key, value);
+    }
+})();
+"""
+
+COOKIE_PARAM_KEYS = ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expires')
+
+def site_domain():
+    host = urlparse(ADD_STATEMENT_URL).hostname
+    return '.'.join(host.split('.')[-2:])
+
+def save_auth_state(driver, session_file_path=None):
+    """Save the EzLynx cookies and web storage after a successful login."""
+    session_file_path = session_file_path or SESSION_FILE_PATH
+    domain = site_domain()
+    cookies = [
+        {key: cookie[key] for key in COOKIE_PARAM_KEYS if key in cookie}
+        for cookie in driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']
+        if cookie['domain'].lstrip('.').endswith(domain)
+    ]
+    storage = driver.execute_script("""
+        const dump = (store) => Object.fromEntries(Object.keys(store).map((key) => [key, store.getItem(key)]));
+        return { origin: location.origin, local: dump(localStorage), session: dump(sessionStorage) };
+    """)
+    # Pool workers save the same file, so each writes its own temp file and
+    # swaps it in whole; readers never see a half-written session
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(session_file_path) or '.')
+        with os.fdopen(fd, 'w') as file:
+            json.dump({"savedAt": time.time(), "cookies": cookies, "storage": storage}, file)
+        os.replace(temp_path, session_file_path)
+        print(f"Saved EzLynx session ({len(cookies)} cookies).")
+    except Exception as e:
+        print(f"Error writing session file {session_file_path}: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def restore_auth_state(driver, session_file_path=None):
+    """Load a saved session into the driver. Returns True if it is still logged in."""
+    session_file_path = session_file_path or SESSION_FILE_PATH
+    if not os.path.exists(session_file_path):
+        return False
+    try:
+        with open(session_file_path, 'r') as file:
+            state = json.load(file)
+    except Exception as e:
+        print(f"Error reading session file {session_file_path}: {e}")
+        return False
+
+    now = time.time()
+    # Session cookies have expires == -1 and are exactly what a new Chrome loses
+    cookies = [cookie for cookie in state.get("cookies", []) if not 0 < cookie.get('expires', -1) < now]
+    if not cookies:
+        return False
+    driver.execute_cdp_cmd('Network.setCookies', {'cookies': cookies})
+
+    script_id = None
+    storage = state.get("storage")
+    if storage:
+        script_id = driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument',
+                                           {'source': RESTORE_STORAGE_JS % json.dumps(storage)})['identifier']
+    try:
+        driver.get(ADD_STATEMENT_URL)
+    finally:
+        if script_id:
+            driver.execute_cdp_cmd('Page.removeScriptToEvaluateOnNewDocument', {'identifier': script_id})
+
+    return is_on_add_statement(driver)
+
+def read_combined_json_file(file_path):
+    try:
+        with open(file_path, 'r') as file:
+            return json.load(file)
+    except Exception as e:
+        print(f"Error reading JSON file {file_path}: {e}")
+        return {"nameMappings": [], "skipList": []}
+
+carrier_catalog = CarrierCatalog(CARRIER_CATALOG_PATH)
+_settings_cache = {}
+_settings_store = None
+
+def get_settings_store():
+    """The shared SettingsStore, created (and migrated from JSON) on first use."""
+    global _settings_store
+    if _settings_store is None:
+        create_user_data_directory()
+        _settings_store = SettingsStore(SETTINGS_DB_PATH, LEGACY_SETTINGS_PATHS)
+    return _settings_store
+
+_direct_submitter = None
+
+def get_direct_submitter(pool_size=4):
+    """The shared DirectSubmitter, using the session file the browser saves after login."""
+    global _direct_submitter
+    if _direct_submitter is None:
+        _direct_submitter = DirectSubmitter(DIRECT_TEMPLATE_PATH, SESSION_FILE_PATH, carrier_catalog, pool_size)
+    return _direct_submitter
+
+def load_settings(file_path=None):
+    """Return (settings data, compiled NameResolver), rebuilt only when the settings change.
+
+    Settings come from the SQLite store unless file_path names a
+    combinedData.json style file.
+    """
+    if file_path is not None and file_path.lower().endswith('.json'):
+        try:
+            version = os.path.getmtime(file_path)
+        except OSError:
+            version = None
+    else:
+        store = get_settings_store()
+        file_path = store.db_path
+        version = store.revision()
+
+    cached = _settings_cache.get(file_path)
+    if cached is not None and cached[0] == version:
+        return cached[1], cached[2]
+
+    if file_path.lower().endswith('.json'):
+        data = read_combined_json_file(file_path)
+    else:
+        data = {"nameMappings": store.mappings(), "skipList": store.skip_list()}
+        data.update(store.overrides())
+    # Start from the defaults so an override removed in the settings window stops applying
+    for key, (target, defaults) in OVERRIDE_TARGETS.items():
+        target.clear()
+        target.update(defaults)
+        target.update(data.get(key, {}))
+    resolver = NameResolver(data.get("nameMappings", []), data.get("skipList", []))
+    _settings_cache[file_path] = (version, data, resolver)
+    return data, resolver
+
+# Sets every service-team row in a single round trip. Values are assigned
+# directly and the input/change events are dispatched so Angular's bindings
+# pick them up the same way they would from a real click or keystroke.
+FILL_SERVICE_TEAM_JS = """
+const [rows, offset] = arguments;
+const tableRows = document.querySelectorAll('#serviceTeamTable > tbody > tr');
+const fire = (element, type) => element.dispatchEvent(new Event(type, { bubbles: true }));
+const results = [];
+
+for (let i = 0; i < rows.length; i++) {
+    const result = { row: offset + i + 1, name: rows[i].name, nameSet: false, amountSet: false, reason: null };
+    results.push(result);
+
+    const tableRow = tableRows[offset + i];
+    if (!tableRow) {
+        result.reason = 'row missing';
+        continue;
+    }
+
+    const select = tableRow.querySelector('td:nth-child(1) > div > select');
+    if (!select) {
+        result.reason = 'select missing';
+    } else {
+        const option = Array.from(select.options).find(
+            (opt) => opt.text.replace(' (Producer)', '').trim() === rows[i].name
+        );
+        if (option) {
+            select.value = option.value;
+            option.selected = true;
+            fire(select, 'change');
+            result.nameSet = true;
+        } else {
+            result.reason = 'name not found';
+        }
+    }
+
+    const input = tableRow.querySelector('td.input-append > input');
+    if (input) {
+        input.focus();
+        input.value = rows[i].amount;
+        fire(input, 'input');
+        fire(input, 'change');
+        input.blur();
+        result.amountSet = true;
+    } else if (!result.reason) {
+        result.reason = 'amount input missing';
+    }
+}
+return results;
+"""
+
+def fill_service_team(driver, team_list, amount_list, progress=None):
+    rows = [{"name": name, "amount": format_amount(amount)} for name, amount in zip(team_list, amount_list)]
+    # Filled in chunks so progress can be reported and a cancel takes effect mid-fill
+    chunk_size = BULK_ROWS["chunkSize"]
+    results = []
+    for offset in range(0, len(rows), chunk_size):
+        results += driver.execute_script(FILL_SERVICE_TEAM_JS, rows[offset:offset + chunk_size], offset)
+        if progress is not None:
+            progress(len(results), len(rows))
+
+    for result in results:
+        if not result['nameSet'] or not result['amountSet']:
+            print(f"Row {result['row']}: '{result['name']}' not filled ({result['reason']}). Skipping.")
+
+    filled = sum(1 for result in results if result['nameSet'] and result['amountSet'])
+    print(f"Filled {filled} of {len(results)} service team rows.")
+    return results
+
+def read_producer_options(driver):
+    # Every row's select carries the same producer list, so the first one is enough
+    return driver.execute_script("""
+        const select = document.querySelector('#serviceTeamTable > tbody > tr td:nth-child(1) > div > select');
+        return select ? Array.from(select.options).map((option) => option.text) : [];
+    """)
+
+def match_team_to_options(driver, team_list):
+    """Swap each team name for the producer option it matches, reporting near misses."""
+    start = time.perf_counter()
+    report = match_producers(team_list, read_producer_options(driver))
+    print(f"Matched {len(report['assigned'])} producer names in {time.perf_counter() - start:.3f}s "
+          f"({report['exact']} exact, {len(report['fuzzy'])} fuzzy).")
+
+    for name, option, score in report["fuzzy"]:
+        print(f"Matched '{name}' to '{option}' (score {score:.0f}).")
+    for name, option, score in report["review"]:
+        print(f"Review: '{name}' is closest to '{option}' (score {score:.0f}), not assigned.")
+    for name in report["unmatched"]:
+        print(f"No producer option resembles '{name}'.")
+
+    return [report["assigned"].get(name, name) for name in team_list], report
+
+# Seconds to wait for each page condition before giving up. Any entry can be
+# overridden with a "waitTimeouts" entry in the settings overrides.
+WAIT_TIMEOUTS = {
+    "login": 600,
+    "carrier_options": 15,
+    "statement_created": 30,
+    "autocomplete_open": 10,
+    "autocomplete_closed": 10,
+    "add_team_button": 10,
+    "team_rows": 15,
+    "datepicker_open": 5,
+    "datepicker_closed": 5,
+    "add_button": 10,
+    "submitted": 30,
+}
+
+AUTOCOMPLETE_ITEM_SELECTOR = "ul.ui-autocomplete li.ui-menu-item, ul.typeahead li, ul.dropdown-menu li"
+ADD_TEAM_BUTTON_SELECTOR = "#CommissionInfo > div:nth-child(2) > fieldset > div > div:nth-child(1) > h4 > button"
+
+def timed_wait(driver, timeout_key, condition, description):
+    timeout = WAIT_TIMEOUTS[timeout_key]
+    start = time.perf_counter()
+    result = WebDriverWait(driver, timeout).until(condition, f"Timed out after {timeout}s waiting for {description}")
+    print(f"Waited {time.perf_counter() - start:.2f}s for {description}")
+    return result
+
+def select_has_options(select_id, minimum=2):
+    def condition(driver):
+        count = driver.execute_script(
+            "const s = document.getElementById(arguments[0]); return s ? s.options.length : 0;", select_id)
+        return count >= minimum
+    return condition
+
+def autocomplete_visible(visible=True):
+    def condition(driver):
+        shown = driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0])).some(el => el.offsetParent !== null);",
+            AUTOCOMPLETE_ITEM_SELECTOR)
+        return shown == visible
+    return condition
+
+def table_has_rows(count):
+    def condition(driver):
+        rows = driver.execute_script("return document.querySelectorAll('#serviceTeamTable > tbody > tr').length;")
+        return rows == count
+    return condition
+
+def datepicker_closed(input_element):
+    def condition(driver):
+        if not input_element.get_attribute('value'):
+            return False
+        return not driver.execute_script(
+            "const p = document.getElementById('ui-datepicker-div'); return !!p && p.offsetParent !== null;")
+    return condition
+
+# Rows added per batch before yielding to the browser; override with a
+# "bulkRows" entry in the settings overrides.
+BULK_ROWS = {
+    "chunkSize": 100,
+}
+
+# Adds rows in chunks inside one async call. When AngularJS debug info is
+# available the button's ng-click expression is evaluated directly, so each
+# chunk costs a single digest; otherwise the button is clicked in a loop.
+BULK_ADD_ROWS_JS = """
+const [count, chunkSize, buttonSelector, done] = arguments;
+const button = document.querySelector(buttonSelector);
+const before = document.querySelectorAll('#serviceTeamTable > tbody > tr').length;
+if (!button) {
+    done({ before: before, mode: 'button missing' });
+    return;
+}
+
+const expression = button.getAttribute('ng-click');
+const scope = window.angular && expression ? window.angular.element(button).scope() : null;
+const addChunk = scope
+    ? (n) => scope.$apply(() => { for (let i = 0; i < n; i++) scope.$eval(expression); })
+    : (n) => { for (let i = 0; i < n; i++) button.click(); };
+const mode = scope ? 'angular scope' : 'button clicks';
+
+let remaining = count;
+const step = () => {
+    const n = Math.min(chunkSize, remaining);
+    addChunk(n);
+    remaining -= n;
+    if (remaining > 0) {
+        setTimeout(step, 0);
+    } else {
+        done({ before: before, mode: mode });
+    }
+};
+if (count > 0) {
+    step();
+} else {
+    done({ before: before, mode: mode });
+}
+"""
+
+def pick_today(driver, input_element):
+    # Type the date first: the jQuery UI "Today" button only moves the calendar
+    # unless the page patches it, so the field's value can't rely on the click
+    if not input_element.get_attribute('value'):
+        input_element.send_keys(datetime.now().strftime('%m/%d/%Y'))
+    today_btn = timed_wait(driver, "datepicker_open",
+                           EC.element_to_be_clickable((By.CLASS_NAME, "ui-datepicker-current")),
+                           "datepicker to open")
+    today_btn.click()
+    # Nor does it close the picker, so close it explicitly
+    input_element.send_keys(Keys.ESCAPE)
+    timed_wait(driver, "datepicker_closed", datepicker_closed(input_element), "datepicker to close")
+
+def read_lines(file_path):
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return file.read().strip().splitlines()
+
+def prepare_team(names, amounts, resolver, aggregate=False):
+    """Resolve names against the mappings and skip list, returning the resolution report.
+
+    With aggregate, repeated producers are merged into one row each.
+    """
+    if len(names) != len(amounts):
+        raise ValueError("Names and amounts must have the same number of lines.")
+
+    report = resolver.resolve_team(names, [parse_amount(amount) for amount in amounts])
+    for row in report["rows"]:
+        if row["chain"]:
+            print(f"Remapping '{row['original']}' to '{row['resolved']}'")
+        if row["skipped"]:
+            print(f"Removed: Name '{row['resolved']}', Amount '{row['amount']}'")
+
+    if aggregate:
+        before = len(report["team_list"])
+        report = aggregate_team(report)
+        for merge in report["merges"]:
+            print(f"Merged lines {', '.join(map(str, merge['lines']))} into '{merge['name']}': {merge['amount']}")
+        print(f"Combined {before} rows into {len(report['team_list'])}, total {sum(report['amount_list'])}.")
+    return report
+
+def create_driver(user_data_dir=USER_DATA_DIR, headless=False):
+    chrome_options = Options()
+    chrome_options.add_argument(f"user-data-dir={user_data_dir}")
+    chrome_options.add_argument('profile-directory=Default')
+    chrome_options.add_argument("--window-size=1024,768")
+    if headless:
+        chrome_options.add_argument("--headless=new")
+
+    # Fall back to Selenium Manager when the bundled Windows driver is not there
+    service = Service(CHROME_DRIVER_PATH) if os.path.exists(CHROME_DRIVER_PATH) else Service()
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+def open_add_statement(driver):
+    driver.get(ADD_STATEMENT_URL)
+    if not is_on_add_statement(driver):
+        if restore_auth_state(driver):
+            print("Restored saved EzLynx session.")
+        else:
+            wait_for_login(driver)
+            save_auth_state(driver)
+            driver.get(ADD_STATEMENT_URL)
+    elif not os.path.exists(SESSION_FILE_PATH):
+        save_auth_state(driver)
+    timed_wait(driver, "carrier_options", select_has_options('CarrierID'), "carrier list to load")
+
+def select_carrier(driver, desired_carrier):
+    carrier_catalog.select(driver, 'CarrierID', desired_carrier)
+
+def create_statement(driver, statement_number, comment):
+    # Fill out form fields
+    statement_number_input = driver.find_element(By.ID, 'StatementNumber')
+    statement_number_input.send_keys(statement_number)
+
+    statement_date_input = driver.find_element(By.ID, 'StatementDate')
+    pick_today(driver, statement_date_input)
+
+    premium_input = driver.find_element(By.ID, 'Premium')
+    premium_input.send_keys('0')
+
+    commission_input = driver.find_element(By.ID, 'Commission')
+    commission_input.send_keys('0')
+
+    comment_textarea = driver.find_element(By.ID, 'Comment')
+    comment_textarea.send_keys(comment)
+
+    add_btn = driver.find_element(By.CSS_SELECTOR, "#AddStatementBtn")
+    add_btn.click()
+
+    # Search and select
+    applicant_input = timed_wait(driver, "statement_created",
+                                 EC.element_to_be_clickable((By.CSS_SELECTOR, "#policySearchTerm")),
+                                 "statement to be created")
+    applicant_input.send_keys("Gold Service Fee")
+    timed_wait(driver, "autocomplete_open", autocomplete_visible(True), "autocomplete suggestions")
+    applicant_input.send_keys(Keys.ARROW_DOWN)
+    applicant_input.send_keys(Keys.ENTER)
+    timed_wait(driver, "autocomplete_closed", autocomplete_visible(False), "autocomplete selection")
+
+def create_team_rows(driver, count):
+    timed_wait(driver, "add_team_button", EC.element_to_be_clickable((By.CSS_SELECTOR, ADD_TEAM_BUTTON_SELECTOR)),
+               "add team button")
+
+    driver.set_script_timeout(WAIT_TIMEOUTS["team_rows"])
+    result = driver.execute_async_script(BULK_ADD_ROWS_JS, count, BULK_ROWS["chunkSize"], ADD_TEAM_BUTTON_SELECTOR)
+    print(f"Requested {count} service team rows via {result['mode']}.")
+
+    expected = result["before"] + count
+    timed_wait(driver, "team_rows", table_has_rows(expected), f"{expected} service team rows")
+
+def fill_team(driver, team_list, amount_list, progress=None):
+    team_list, match_report = match_team_to_options(driver, team_list)
+
+    # Fill every row's producer and amount in a few batched calls
+    fill_results = fill_service_team(driver, team_list, amount_list, progress)
+    return match_report, fill_results
+
+def fill_transaction(driver):
+    # Select transaction type
+    select_trans_type = driver.find_element(By.CSS_SELECTOR, "select[name='TransactionType']")
+    transaction_option = select_trans_type.find_element(By.CSS_SELECTOR, "option[value='PMT']")
+    transaction_option.click()
+
+    date_now_input = driver.find_element(By.ID, "TransactionDate")
+    date_now_input.click()
+    pick_today(driver, date_now_input)
+
+    prem_input = driver.find_element(By.ID, 'Premium')
+    comm_input = driver.find_element(By.NAME, 'CommissionAmount')
+
+    prem_input.clear()
+    prem_input.send_keys('0')
+
+    comm_input.clear()
+    comm_input.send_keys('0')
+
+    timed_wait(driver, "add_button", EC.visibility_of_element_located((By.CSS_SELECTOR, ADD_BUTTON_SELECTOR)),
+               "add button")
+
+# Everything the Add button will submit, read in one round trip
+READ_BACK_JS = """
+const selectedText = (select) => (select && select.value && select.selectedIndex >= 0
+    ? select.options[select.selectedIndex].text.trim() : '');
+const statementNumber = document.getElementById('StatementNumber');
+return {
+    carrier: selectedText(document.getElementById('CarrierID')),
+    statementNumber: statementNumber ? statementNumber.value : null,
+    rows: Array.from(document.querySelectorAll('#serviceTeamTable > tbody > tr')).map((row) => {
+        const input = row.querySelector('td.input-append > input');
+        return {
+            producer: selectedText(row.querySelector('td:nth-child(1) > div > select')),
+            amount: input ? input.value : null,
+        };
+    }),
+};
+"""
+
+# Mismatches listed individually; the rest are only counted
+MAX_LISTED_MISMATCHES = 50
+
+def verify_statement(driver, statement_number, team_list, amount_list):
+    """Read the filled form back and diff it against what was meant to be entered.
+
+    Returns {ok, carrier, rows, total, expectedTotal, mismatches}.
+    """
+    page = driver.execute_script(READ_BACK_JS)
+    mismatches = []
+
+    if not page["carrier"]:
+        mismatches.append("No carrier is selected.")
+    if (page["statementNumber"] or '').strip() != statement_number.strip():
+        mismatches.append(f"Statement number is '{page['statementNumber']}', expected '{statement_number}'.")
+    if len(page["rows"]) != len(team_list):
+        mismatches.append(f"The page has {len(page['rows'])} service team rows, expected {len(team_list)}.")
+
+    total = Decimal(0)
+    for index, row in enumerate(page["rows"]):
+        try:
+            amount = parse_amount(row["amount"])
+            total += amount
+        except (InvalidOperation, ValueError, TypeError):
+            amount = None
+        if index >= len(team_list):
+            mismatches.append(f"Row {index + 1}: unexpected row '{row['producer']}' {row['amount']}")
+            continue
+        if clean_option_text(row["producer"]) != team_list[index]:
+            mismatches.append(f"Row {index + 1}: producer is '{clean_option_text(row['producer'])}', "
+                              f"expected '{team_list[index]}'")
+        if amount != parse_amount(amount_list[index]):
+            mismatches.append(f"Row {index + 1}: amount is '{row['amount']}', expected {amount_list[index]}")
+
+    expected_total = sum((parse_amount(amount) for amount in amount_list), Decimal(0))
+    if total != expected_total:
+        mismatches.append(f"Amounts on the page add up to {total}, expected {expected_total}.")
+
+    if mismatches:
+        print(f"Verification found {len(mismatches)} problem(s):")
+        for mismatch in mismatches[:MAX_LISTED_MISMATCHES]:
+            print(f"  {mismatch}")
+    else:
+        print(f"Verified {len(page['rows'])} rows for {page['carrier']}, total {total}.")
+    return {"ok": not mismatches, "carrier": page["carrier"], "rows": len(page["rows"]), "total": total,
+            "expectedTotal": expected_total, "mismatches": mismatches}
+
+def enter_statement(driver, desired_carrier, statement_number, comment, team_list, amount_list, timer=None,
+                    capture=False):
+    """Fill the AddStatement page up to, but not including, the final Add click.
+
+    With capture, the page's requests are recorded so learn_direct_submission
+    can build a direct submission template once Add has been clicked.
+    """
+    if capture:
+        install_request_capture(driver)
+    with timing_span(timer, "carrier_select"):
+        select_carrier(driver, desired_carrier)
+    with timing_span(timer, "statement_creation"):
+        create_statement(driver, statement_number, comment)
+    with timing_span(timer, "row_creation"):
+        create_team_rows(driver, len(team_list))
+    with timing_span(timer, "row_fill"):
+        match_report, fill_results = fill_team(driver, team_list, amount_list, timer.progress if timer else None)
+    with timing_span(timer, "transaction_fields"):
+        fill_transaction(driver)
+    with timing_span(timer, "verify"):
+        # Producers are checked against the names they were mapped to, not the raw input
+        verify_report = verify_statement(driver, statement_number, [fill["name"] for fill in fill_results],
+                                         amount_list)
+    result = {"match": match_report, "fill": fill_results, "verify": verify_report}
+    if capture:
+        result["pageState"] = read_page_state(driver)
+    return result
+
+def submit_directly(carrier, statement_number, comment, team_list, amount_list, timer=None):
+    """Submit over HTTP without the browser. Returns False when the browser has to be used instead.
+
+    Raises RuntimeError when the failure came after data was sent, since
+    EzLynx may already have stored the statement.
+    """
+    submitter = get_direct_submitter()
+    if not submitter.ready():
+        print("Direct submission has not been learned yet. Using the browser for this statement.")
+        return False
+    with timing_span(timer, "direct_submit"):
+        try:
+            submitter.submit(carrier, statement_number, comment, team_list, amount_list)
+        except DirectSubmitError as e:
+            if e.sent:
+                raise RuntimeError(f"Direct submission of statement {statement_number} failed after it was sent: "
+                                   f"{e} Check EzLynx for the statement before entering it again.")
+            print(f"Direct submission failed: {e} Using the browser instead.")
+            return False
+    print(f"Submitted statement {statement_number} directly ({len(team_list)} rows).")
+    return True
+
+def learn_direct_submission(driver, result, statement_number, comment, amount_list):
+    """After a captured browser submission, save the request template and the current cookies."""
+    if learn_template(driver, result["pageState"], statement_number, comment, amount_list, DIRECT_TEMPLATE_PATH):
+        save_auth_state(driver)
+        get_direct_submitter().reset()
+
+def record_outcome(timer, report, result=None):
+    """Store row/skip/miss counts on the timer and log every name left off the statement."""
+    skipped = [(row["original"], "skip list") for row in report["rows"] if row["skipped"]]
+    missed = []
+    if result is not None:
+        missed = [(fill["name"], fill["reason"]) for fill in result["fill"]
+                  if not fill["nameSet"] or not fill["amountSet"]]
+
+    timer.counts.update({
+        "lines": len(report["rows"]),
+        "rows": len(report["team_list"]),
+        "remapped": report["remapped"],
+        "skipped": len(skipped),
+        "fuzzyMatched": len(result["match"]["fuzzy"]) if result else 0,
+        "missed": len(missed),
+        "mismatches": len(result["verify"]["mismatches"]) if result else 0,
+    })
+    if "merges" in report:
+        timer.counts["merges"] = [{"producer": merge["name"], "lines": merge["lines"], "amount": format_amount(merge["amount"])}
+                                  for merge in report["merges"]]
+    append_skipped_log(SKIPPED_LOG_PATH, timer.statement_number, skipped + missed)
+
+# How a saved statement is recognised after Add is clicked: the Add button
+# disappearing, or an element matching savedSelector appearing. Override
+# with a "submitDetection" entry in the settings overrides.
+SUBMIT_DETECTION = {
+    "savedSelector": ".alert-success",
+}
+
+# Each settings override, the dict it updates and that dict's defaults
+OVERRIDE_TARGETS = {key: (target, dict(target)) for key, target in (
+    ("waitTimeouts", WAIT_TIMEOUTS),
+    ("matchThresholds", MATCH_THRESHOLDS),
+    ("bulkRows", BULK_ROWS),
+    ("submitDetection", SUBMIT_DETECTION),
+)}
+# How long each wait for the Add click lasts before it is re-armed. Cancels
+# are noticed between waits, the click itself is seen immediately.
+ADD_CLICK_REARM_SECONDS = 5
+
+# Resolves as soon as the statement is saved, or with the current state when
+# the timeout passes. The click listener and observer are installed once per
+# page and shared by every re-armed call. The click is also kept in
+# sessionStorage so it survives the page navigating away.
+WAIT_FOR_SUBMIT_JS = """
+const [buttonSelector, savedSelector, timeoutMs, reset, done] = arguments;
+const watch = window.addStatementWatch ||
+    (window.addStatementWatch = { clicked: false, listeners: new Set(), before: new Set() });
+watch.savedSelector = savedSelector;
+const savedElements = () => (watch.savedSelector ? Array.from(document.querySelectorAll(watch.savedSelector)) : []);
+if (reset) {
+    watch.clicked = false;
+    watch.before = new Set();
+    sessionStorage.removeItem('addStatementClicked');
+}
+if (!watch.installed) {
+    watch.installed = true;
+    const notify = () => watch.listeners.forEach((listener) => listener());
+    document.addEventListener('click', (event) => {
+        const button = document.querySelector(buttonSelector);
+        if (button && button.contains(event.target)) {
+            // Runs in the capture phase, before the page's own handler sends the save
+            watch.before = new Set(savedElements());
+            watch.clicked = true;
+            sessionStorage.setItem('addStatementClicked', String(Date.now()));
+            notify();
+        }
+    }, true);
+    new MutationObserver(notify).observe(document.body, { childList: true, subtree: true });
+}
+
+// Nothing counts as saved until Add was clicked on this page, and only a
+// saved message that appeared after the click counts; the alert shown when
+// the statement was created is usually still on the page
+const saved = () => watch.clicked && (document.querySelector(buttonSelector) === null ||
+    savedElements().some((element) => !watch.before.has(element)));
+if (saved()) {
+    done('submitted');
+    return;
+}
+const listener = () => {
+    if (saved()) {
+        finish('submitted');
+    }
+};
+const timer = setTimeout(() => finish(watch.clicked ? 'clicked' : 'waiting'), timeoutMs);
+const finish = (state) => {
+    clearTimeout(timer);
+    watch.listeners.delete(listener);
+    done(state);
+};
+watch.listeners.add(listener);
+"""
+
+def wait_for_add_click(driver, events=None):
+    """Block until the user clicks Add and the statement is saved.
+
+    Returns "submitted", "navigated" (the page left AddStatement after the
+    click) or "clicked" (Add was clicked but nothing confirmed the save
+    within the "submitted" timeout).
+    """
+    driver.set_script_timeout(ADD_CLICK_REARM_SECONDS + 10)
+    reset = True
+    clicked_at = None
+    while True:
+        if events is not None:
+            events.check_cancelled()
+        try:
+            state = driver.execute_async_script(WAIT_FOR_SUBMIT_JS, ADD_BUTTON_SELECTOR,
+                                                SUBMIT_DETECTION["savedSelector"],
+                                                ADD_CLICK_REARM_SECONDS * 1000, reset)
+        except WebDriverException:
+            # The page unloaded under the script; find out whether Add was clicked first
+            WebDriverWait(driver, WAIT_TIMEOUTS["submitted"]).until(
+                lambda d: d.execute_script("return document.readyState") == "complete")
+            if driver.execute_script("return sessionStorage.getItem('addStatementClicked')"):
+                print("Add was clicked and the page navigated away.")
+                return "navigated"
+            if not is_on_add_statement(driver):
+                raise RuntimeError("Left the AddStatement page without clicking Add.")
+            # Reloaded without a click; the listener is installed again on the next call
+            continue
+        reset = False
+
+        if state == "submitted":
+            print("Statement saved.")
+            return state
+        if state == "clicked":
+            clicked_at = clicked_at or time.perf_counter()
+            if time.perf_counter() - clicked_at > WAIT_TIMEOUTS["submitted"]:
+                print("Add was clicked but the page never confirmed the save. Assuming it was submitted.")
+                return state
+
+def submit_statement(driver):
+    add_button = driver.find_element(By.CSS_SELECTOR, ADD_BUTTON_SELECTOR)
+    add_button.click()
+    timed_wait(driver, "submitted", EC.staleness_of(add_button), "statement to be submitted")
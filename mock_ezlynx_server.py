@@ -0,0 +1,292 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ADD_STATEMENT_PATH = '/applicantportal/Commissions/DirectBill/AddStatement'
+CREATE_STATEMENT_PATH = '/applicantportal/Commissions/DirectBill/CreateStatement'
+SAVE_STATEMENT_PATH = '/applicantportal/Commissions/DirectBill/SaveStatement'
+
+# A stand-in for the EzLynx AddStatement page. It keeps the ids, classes and
+# structural selectors that manual_import relies on, and delays each async
+# step (carrier load, statement creation, autocomplete) by uiDelay ms the way
+# the real Angular page does.
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Add Statement (mock)</title>
+<style>
+  #ui-datepicker-div { display: none; position: absolute; background: #eee; padding: 4px; }
+  ul.ui-autocomplete { display: none; list-style: none; margin: 0; padding: 0; border: 1px solid #999; }
+  li.ui-state-focus { background: #cde; }
+  #CommissionInfo { display: none; }
+</style>
+</head>
+<body>
+<form id="StatementForm" onsubmit="return false;">
+  <select id="CarrierID"><option value="">Select a carrier</option></select>
+  <input id="StatementNumber" type="text">
+  <input id="StatementDate" class="hasDatepicker" type="text">
+  <input id="Premium" type="text">
+  <input id="Commission" type="text">
+  <textarea id="Comment"></textarea>
+  <button id="AddStatementBtn" class="btn" type="button">Add Statement</button>
+</form>
+
+<div id="CommissionInfo">
+  <div>
+    <input id="policySearchTerm" type="text" autocomplete="off">
+    <ul class="ui-autocomplete"><li class="ui-menu-item">Gold Service Fee</li></ul>
+  </div>
+  <div>
+    <fieldset>
+      <div>
+        <div>
+          <h4>Service Team <button type="button" class="btn btn-small">Add Team Member</button></h4>
+          <table id="serviceTeamTable"><tbody></tbody></table>
+        </div>
+      </div>
+    </fieldset>
+  </div>
+  <div>
+    <select name="TransactionType">
+      <option value="">Select</option>
+      <option value="PMT">Payment</option>
+      <option value="ADJ">Adjustment</option>
+    </select>
+    <input id="TransactionDate" class="hasDatepicker" type="text">
+    <input name="CommissionAmount" type="text">
+    <button type="button" class="btn btn-primary ng-binding">Add</button>
+  </div>
+</div>
+
+<div id="ui-datepicker-div"><button type="button" class="ui-datepicker-current">Today</button></div>
+
+<script>
+const config = __CONFIG__;
+const later = (fn) => setTimeout(fn, config.uiDelay);
+const byId = (id) => document.getElementById(id);
+const show = (el, shown) => { el.style.display = shown ? 'block' : 'none'; };
+let statementId = null;
+
+later(() => {
+  const carrierSelect = byId('CarrierID');
+  config.carriers.forEach((name, index) => carrierSelect.add(new Option(name, String(1000 + index))));
+});
+
+// Datepicker
+const picker = byId('ui-datepicker-div');
+let pickerInput = null;
+document.querySelectorAll('.hasDatepicker').forEach((input) => {
+  input.addEventListener('focus', () => {
+    pickerInput = input;
+    const rect = input.getBoundingClientRect();
+    picker.style.left = rect.left + 'px';
+    picker.style.top = (rect.bottom + window.scrollY) + 'px';
+    show(picker, true);
+  });
+  input.addEventListener('keydown', (event) => {
+    if (event.key === 'Escape') show(picker, false);
+  });
+});
+picker.querySelector('.ui-datepicker-current').addEventListener('click', () => {
+  const now = new Date();
+  const pad = (n) => String(n).padStart(2, '0');
+  if (pickerInput) pickerInput.value = `${pad(now.getMonth() + 1)}/${pad(now.getDate())}/${now.getFullYear()}`;
+});
+
+// Statement creation: the server assigns the id the final submission must carry
+byId('AddStatementBtn').addEventListener('click', () => {
+  const header = {
+    CarrierID: byId('CarrierID').value,
+    StatementNumber: byId('StatementNumber').value,
+    StatementDate: byId('StatementDate').value,
+    Comment: byId('Comment').value,
+  };
+  later(() => {
+    fetch('__CREATE_PATH__', {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(header),
+    }).then((response) => response.json()).then((result) => {
+      statementId = result.statementId;
+      show(byId('CommissionInfo'), true);
+    });
+  });
+});
+
+// Policy autocomplete
+const search = byId('policySearchTerm');
+const suggestions = document.querySelector('ul.ui-autocomplete');
+const suggestion = suggestions.querySelector('li');
+search.addEventListener('input', () => {
+  if (search.value.length >= 3) later(() => show(suggestions, true));
+});
+search.addEventListener('keydown', (event) => {
+  if (event.key === 'ArrowDown') {
+    suggestion.classList.add('ui-state-focus');
+  } else if (event.key === 'Enter' && suggestion.classList.contains('ui-state-focus')) {
+    search.value = suggestion.textContent;
+    suggestion.classList.remove('ui-state-focus');
+    show(suggestions, false);
+  }
+});
+
+// Service team rows
+const producerOptions = ['<option value="">Select</option>'].concat(
+  config.producers.map((name, index) => `<option value="${2000 + index}">${name} (Producer)</option>`)
+).join('');
+const tbody = document.querySelector('#serviceTeamTable > tbody');
+document.querySelector('#CommissionInfo h4 > button').addEventListener('click', () => {
+  const row = document.createElement('tr');
+  row.innerHTML = `<td><div><select>${producerOptions}</select></div></td>` +
+                  '<td class="input-append"><input type="text"></td>';
+  tbody.appendChild(row);
+});
+
+// Final submission
+document.querySelector('button.btn.btn-primary.ng-binding').addEventListener('click', (event) => {
+  const button = event.currentTarget;
+  const payload = {
+    StatementID: statementId,
+    CarrierID: byId('CarrierID').value,
+    StatementNumber: byId('StatementNumber').value,
+    StatementDate: byId('StatementDate').value,
+    Comment: byId('Comment').value,
+    TransactionType: document.querySelector("select[name='TransactionType']").value,
+    TransactionDate: byId('TransactionDate').value,
+    ServiceTeam: Array.from(tbody.querySelectorAll('tr')).map((row) => ({
+      ProducerID: row.querySelector('select').value,
+      Amount: row.querySelector('input').value,
+    })),
+  };
+  fetch('__SAVE_PATH__', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload),
+  }).then(() => {
+    button.remove();
+    document.body.insertAdjacentHTML('beforeend', '<div class="alert alert-success">Statement saved</div>');
+  });
+});
+</script>
+</body>
+</html>
+"""
+
+def default_producers(count):
+    return [f"Producer {index:04d} Agent" for index in range(1, count + 1)]
+
+def default_carriers(count=300):
+    carriers = [f"Carrier {index:03d} Insurance" for index in range(1, count + 1)]
+    carriers[0] = "Fortegra Specialty"
+    return carriers
+
+class MockEzLynxServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, ui_delay=0.0, producers=None, carriers=None):
+        super().__init__(address, MockEzLynxHandler)
+        self.latency = latency
+        self.ui_delay = ui_delay
+        self.producers = producers if producers is not None else default_producers(50)
+        self.carriers = carriers if carriers is not None else default_carriers()
+        self.statements = []
+        self.created = {}
+        self._lock = threading.Lock()
+
+    @property
+    def add_statement_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{ADD_STATEMENT_PATH}"
+
+    def create_statement(self, header):
+        with self._lock:
+            statement_id = 100001 + len(self.created)
+            self.created[statement_id] = header
+            return statement_id
+
+    def record_statement(self, statement):
+        """Store a submitted statement. Returns False when its StatementID was never created."""
+        with self._lock:
+            if statement.get("StatementID") not in self.created:
+                return False
+            self.statements.append(statement)
+            return True
+
+class MockEzLynxHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, content_type, body):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        path = self.path.split('?', 1)[0]
+        if path == ADD_STATEMENT_PATH:
+            config = {"uiDelay": int(self.server.ui_delay * 1000), "carriers": self.server.carriers,
+                      "producers": self.server.producers}
+            page = (PAGE_TEMPLATE.replace('__CONFIG__', json.dumps(config))
+                    .replace('__CREATE_PATH__', CREATE_STATEMENT_PATH).replace('__SAVE_PATH__', SAVE_STATEMENT_PATH))
+            self._send(200, 'text/html; charset=utf-8', page)
+        elif path == '/mock/statements':
+            self._send(200, 'application/json', json.dumps(self.server.statements))
+        else:
+            self._send(404, 'text/plain', 'Not found')
+
+    def do_POST(self):
+        time.sleep(self.server.latency)
+        path = self.path.split('?', 1)[0]
+        if path not in (CREATE_STATEMENT_PATH, SAVE_STATEMENT_PATH):
+            self._send(404, 'text/plain', 'Not found')
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, 'application/json', json.dumps({"success": False, "error": "Invalid JSON"}))
+            return
+        if path == CREATE_STATEMENT_PATH:
+            statement_id = self.server.create_statement(body)
+        elif self.server.record_statement(body):
+            statement_id = body["StatementID"]
+        else:
+            self._send(400, 'application/json', json.dumps({"success": False, "error": "Unknown statement"}))
+            return
+        self._send(200, 'application/json', json.dumps({"success": True, "statementId": statement_id}))
+
+def start_mock_server(port=0, latency=0.0, ui_delay=0.0, producers=None, carriers=None):
+    """Start the mock server on a background thread and return it."""
+    server = MockEzLynxServer(('127.0.0.1', port), latency, ui_delay, producers, carriers)
+    threading.Thread(target=server.serve_forever, name='mock-ezlynx', daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the EzLynx AddStatement page.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP response")
+    parser.add_argument("--ui-delay", type=float, default=0.0,
+                        help="seconds before carriers load, statements are created and suggestions appear")
+    parser.add_argument("--producers", type=int, default=50, help="number of producer options per row")
+    args = parser.parse_args()
+
+    server = MockEzLynxServer(('127.0.0.1', args.port), args.latency, args.ui_delay,
+                              default_producers(args.producers))
+    print(f"Mock EzLynx running at {server.add_statement_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
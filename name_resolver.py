@@ -0,0 +1,126 @@
+import re
+import unicodedata
+
+PUNCTUATION = re.compile(r"[^\w\s]")
+
+def normalize_name(name):
+    """Fold case, accents, punctuation and whitespace, so "Marc St. Julien" == "marc st  julien"."""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(ch for ch in name if not unicodedata.combining(ch))
+    name = PUNCTUATION.sub('', name.casefold())
+    return ' '.join(name.split())
+
+class NameResolver:
+    """Name mappings and the skip list compiled into hash indexes on normalized names.
+
+    Build one per settings change and reuse it for every statement. Mappings
+    may chain (A -> B -> C); a chain that loops back on itself is reported in
+    cycles and the names in it are left unmapped.
+    """
+
+    def __init__(self, mappings, skip_list):
+        self._mappings = {}
+        for item in mappings:
+            key = normalize_name(item['original'])
+            # The first rule for a name wins, as it did with the linear scan
+            if key and key not in self._mappings:
+                self._mappings[key] = item['mapped'].strip()
+
+        self._skip = {normalize_name(name) for name in skip_list if name.strip()}
+        self._resolved = {}
+        self.cycles = []
+
+        for key in self._mappings:
+            self._resolve_key(key)
+
+    def _resolve_key(self, key):
+        if key in self._resolved:
+            return self._resolved[key]
+
+        path = []
+        current = key
+        ends_here = False
+        while current in self._mappings and current not in self._resolved and current not in path:
+            path.append(current)
+            target = normalize_name(self._mappings[current])
+            if target == current:
+                # A rule that only fixes spelling or case ends the chain with its own text
+                ends_here = True
+                break
+            current = target
+
+        if ends_here:
+            display, tail = self._mappings[current], []
+        elif current in path:
+            cycle = path[path.index(current):] + [current]
+            self.cycles.append(cycle)
+            print(f"Name mapping cycle ignored: {' -> '.join(cycle)}")
+            display, tail = None, []
+        elif current in self._resolved:
+            display, tail = self._resolved[current]
+        else:
+            display, tail = (self._mappings[path[-1]] if path else None), []
+
+        # Memoize every link so later lookups anywhere on the chain are O(1)
+        for index, link in enumerate(path):
+            self._resolved[link] = (display, path[index:] + tail if display is not None else [])
+        return display, (path + tail if display is not None else [])
+
+    def resolve(self, name):
+        """Return (resolved name, chain of normalized names that were followed)."""
+        display, chain = self._resolve_key(normalize_name(name))
+        if display is None:
+            return name.strip(), []
+        return display, chain
+
+    def is_skipped(self, name):
+        return normalize_name(name) in self._skip
+
+    def resolve_team(self, names, amounts):
+        """Resolve every input line and return one report for the GUI and batch paths.
+
+        The report holds the filtered team_list/amount_list to enter, plus a
+        per-line rows list recording what each name resolved to and why it
+        was kept or skipped.
+        """
+        report = {"rows": [], "team_list": [], "amount_list": [], "remapped": 0, "skipped": 0,
+                  "cycles": self.cycles}
+        for line, (name, amount) in enumerate(zip(names, amounts), start=1):
+            resolved, chain = self.resolve(name)
+            skipped = self.is_skipped(resolved)
+            report["rows"].append({"line": line, "original": name, "resolved": resolved, "chain": chain,
+                                   "amount": amount, "skipped": skipped})
+            if chain:
+                report["remapped"] += 1
+            if skipped:
+                report["skipped"] += 1
+            else:
+                report["team_list"].append(resolved)
+                report["amount_list"].append(amount)
+        return report
+
+def aggregate_team(report):
+    """Merge rows that resolve to the same producer into one row carrying the summed amount.
+
+    Works on a resolve_team report after mapping and skip filtering. Amounts
+    are Decimals, so the merged total is exactly the original total. Returns
+    a new report whose merges list records, for every merged producer, the
+    input lines it came from.
+    """
+    groups = {}
+    for row in report["rows"]:
+        if row["skipped"]:
+            continue
+        key = normalize_name(row["resolved"])
+        group = groups.get(key)
+        if group is None:
+            groups[key] = {"name": row["resolved"], "amount": row["amount"], "lines": [row["line"]]}
+        else:
+            group["amount"] += row["amount"]
+            group["lines"].append(row["line"])
+
+    merged = dict(report)
+    merged["team_list"] = [group["name"] for group in groups.values()]
+    merged["amount_list"] = [group["amount"] for group in groups.values()]
+    merged["merges"] = [group for group in groups.values() if len(group["lines"]) > 1]
+    return merged
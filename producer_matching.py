@@ -0,0 +1,90 @@
+from name_resolver import normalize_name
+
+try:
+    from rapidfuzz import fuzz, process as rf_process, utils as rf_utils
+except ImportError:
+    rf_process = None
+    from fuzzywuzzy import process as fw_process
+
+try:
+    import numpy  # noqa: F401  (rapidfuzz's cdist returns a numpy matrix)
+    HAS_CDIST = rf_process is not None
+except ImportError:
+    HAS_CDIST = False
+
+# Scores are 0-100. At or above "auto" a fuzzy match is assigned without
+# asking; between "review" and "auto" it is only reported as a near miss.
+# Both can be overridden with a "matchThresholds" entry in the settings overrides.
+MATCH_THRESHOLDS = {
+    "auto": 90,
+    "review": 70,
+}
+
+def clean_option_text(text):
+    return text.replace(" (Producer)", "").strip()
+
+def _best_matches(names, choices):
+    """Return (choice index, score) for each name, scoring the whole batch at once."""
+    # token_sort_ratio tolerates "Last First" order and is far cheaper than WRatio
+    if HAS_CDIST:
+        scores = rf_process.cdist(names, choices, scorer=fuzz.token_sort_ratio, processor=rf_utils.default_process,
+                                  workers=-1)
+        best = scores.argmax(axis=1)
+        return [(int(index), float(scores[row, index])) for row, index in enumerate(best)]
+
+    if rf_process is not None:
+        matches = []
+        for name in names:
+            _, score, index = rf_process.extractOne(name, choices, scorer=fuzz.token_sort_ratio,
+                                                    processor=rf_utils.default_process)
+            matches.append((index, float(score)))
+        return matches
+
+    index_of = {choice: index for index, choice in enumerate(choices)}
+    matches = []
+    for name in names:
+        choice, score = fw_process.extractOne(name, choices)
+        matches.append((index_of[choice], float(score)))
+    return matches
+
+def match_producers(names, option_texts):
+    """Match team names against the producer options shared by every row's select.
+
+    Exact matches (after normalize_name folding) are found through a dict.
+    Only the names left over are fuzzy-scored, all in one call. Returns a
+    report whose "assigned" dict maps each input name to the option text to
+    select; names that are near misses or unmatched are not in it.
+    """
+    choices = []
+    by_key = {}
+    for text in option_texts:
+        text = clean_option_text(text)
+        key = normalize_name(text)
+        if key and key not in by_key:
+            by_key[key] = text
+            choices.append(text)
+
+    report = {"assigned": {}, "exact": 0, "fuzzy": [], "review": [], "unmatched": []}
+    pending = []
+    for name in dict.fromkeys(names):
+        option = by_key.get(normalize_name(name))
+        if option is not None:
+            report["assigned"][name] = option
+            report["exact"] += 1
+        else:
+            pending.append(name)
+
+    if pending and choices:
+        for name, (index, score) in zip(pending, _best_matches(pending, choices)):
+            option = choices[index]
+            if score >= MATCH_THRESHOLDS["auto"]:
+                report["assigned"][name] = option
+                report["fuzzy"].append((name, option, score))
+            elif score >= MATCH_THRESHOLDS["review"]:
+                report["review"].append((name, option, score))
+            else:
+                report["unmatched"].append(name)
+    else:
+        report["unmatched"].extend(pending)
+
+    return report
@@ -0,0 +1,57 @@
+import queue
+import threading
+
+class RunCancelled(Exception):
+    """Raised at the next checkpoint after RunEvents.cancel() is called."""
+
+class RunEvents:
+    """One-way message bus from an automation thread to the GUI.
+
+    The worker only ever calls post()/phase()/progress()/check_cancelled();
+    the Tk thread drains the queue from app.after and is the only thing that
+    touches widgets. cancel() may be called from either side.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._cancel = threading.Event()
+
+    def post(self, kind, **data):
+        data["kind"] = kind
+        self._queue.put(data)
+
+    def phase(self, name):
+        self.post("phase", phase=name)
+
+    def progress(self, done, total):
+        self.post("progress", done=done, total=total)
+
+    def error(self, message):
+        self.post("error", message=message)
+
+    def finished(self, status):
+        self.post("finished", status=status)
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise RunCancelled("Run cancelled.")
+
+    def wait_cancelled(self, timeout):
+        """Sleep up to timeout seconds, returning early (True) if the run is cancelled."""
+        return self._cancel.wait(timeout)
+
+    def drain(self, limit=500):
+        events = []
+        while len(events) < limit:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
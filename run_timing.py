@@ -0,0 +1,85 @@
+import contextlib
+import json
+import threading
+import time
+from datetime import datetime
+
+_log_lock = threading.Lock()
+
+class RunTimer:
+    """Timing spans for one statement run, appended to a JSONL log when it finishes.
+
+    current_phase and elapsed() are safe to read from another thread. When a
+    RunEvents bus is attached, every span start is also posted to it and is a
+    cancellation checkpoint.
+    """
+
+    def __init__(self, statement_number, carrier, events=None):
+        self.statement_number = statement_number
+        self.carrier = carrier
+        self.events = events
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.phases = {}
+        self.counts = {}
+        self.current_phase = "starting"
+        self._start = time.perf_counter()
+        self._phase_start = self._start
+
+    def elapsed(self):
+        return time.perf_counter() - self._start
+
+    def phase_elapsed(self):
+        return time.perf_counter() - self._phase_start
+
+    @contextlib.contextmanager
+    def span(self, phase):
+        if self.events is not None:
+            self.events.check_cancelled()
+            self.events.phase(phase)
+        self.current_phase = phase
+        self._phase_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - self._phase_start
+            self.phases[phase] = round(self.phases.get(phase, 0.0) + seconds, 3)
+
+    def progress(self, done, total):
+        if self.events is not None:
+            self.events.progress(done, total)
+            self.events.check_cancelled()
+
+    def finish(self, log_path, status):
+        self.current_phase = "done" if status == "ok" else status
+        record = {
+            "startedAt": self.started_at,
+            "statementNumber": self.statement_number,
+            "carrier": self.carrier,
+            "status": status,
+            "totalSeconds": round(self.elapsed(), 3),
+            "phases": self.phases,
+        }
+        record.update(self.counts)
+        with _log_lock:
+            try:
+                with open(log_path, 'a', encoding='utf-8') as file:
+                    file.write(json.dumps(record) + '\n')
+            except Exception as e:
+                print(f"Error writing run log {log_path}: {e}")
+        return record
+
+def timing_span(timer, phase):
+    return timer.span(phase) if timer is not None else contextlib.nullcontext()
+
+def append_skipped_log(log_path, statement_number, entries):
+    """Append (name, reason) pairs for names that did not make it onto the statement."""
+    if not entries:
+        return
+    stamp = datetime.now().isoformat(timespec='seconds')
+    with _log_lock:
+        try:
+            with open(log_path, 'a', encoding='utf-8') as file:
+                for name, reason in entries:
+                    file.write(f"{stamp}\t{statement_number}\t{name}\t{reason}\n")
+        except Exception as e:
+            print(f"Error writing skipped names log {log_path}: {e}")
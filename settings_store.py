@@ -0,0 +1,272 @@
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from name_resolver import normalize_name
+from statement_import import format_amount
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS name_mappings (
+    original_key TEXT PRIMARY KEY,
+    original TEXT NOT NULL,
+    mapped TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS name_mappings_position ON name_mappings (position);
+CREATE TABLE IF NOT EXISTS skip_names (
+    name_key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS overrides (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS statements (
+    id INTEGER PRIMARY KEY,
+    statement_number TEXT NOT NULL,
+    statement_key TEXT NOT NULL,
+    carrier TEXT,
+    rows INTEGER,
+    total TEXT,
+    submitted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS statements_key ON statements (statement_key);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Objects in combinedData.json that tune the automation rather than map names
+OVERRIDE_KEYS = ("waitTimeouts", "matchThresholds", "bulkRows", "submitDetection")
+
+def statement_key(statement_number):
+    return statement_number.strip().casefold()
+
+class SettingsStore:
+    """Name mappings, the skip list, overrides and statement history in SQLite.
+
+    Names are keyed by normalize_name, so "first rule wins" and duplicate
+    checks are primary-key lookups. Every settings write bumps a revision
+    number that callers use to tell whether a cached NameResolver is still
+    current; recording statement history does not. A
+    connection is opened per call, which keeps the store safe to share
+    between the GUI and worker threads.
+    """
+
+    def __init__(self, db_path, legacy_json_paths=()):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            if conn.execute("PRAGMA user_version").fetchone()[0] == 0:
+                self._migrate(conn, legacy_json_paths)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @contextlib.contextmanager
+    def _write(self, bump_revision=True):
+        with self._lock, self._connect() as conn:
+            before = conn.total_changes
+            yield conn
+            # A save that changed nothing keeps the cached NameResolver
+            if bump_revision and conn.total_changes > before:
+                conn.execute("INSERT INTO meta (key, value) VALUES ('revision', '1') "
+                             "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+    def _migrate(self, conn, legacy_json_paths):
+        # Older versions read User Data/combinedData.json but the settings
+        # window saved to the working directory. Import every copy found,
+        # newest first, so the most recent edit wins a conflicting rule.
+        existing = [path for path in legacy_json_paths if os.path.isfile(path)]
+        existing = list(dict.fromkeys(os.path.abspath(path) for path in existing))
+        existing.sort(key=os.path.getmtime, reverse=True)
+        for path in existing:
+            try:
+                with open(path, 'r') as file:
+                    data = json.load(file)
+            except Exception as e:
+                print(f"Error reading JSON file {path}: {e}")
+                continue
+            added = self._insert_mappings(conn, data.get("nameMappings", []))
+            skipped = self._insert_skip_names(conn, data.get("skipList", []))
+            for key in OVERRIDE_KEYS:
+                if key in data:
+                    conn.execute("INSERT OR IGNORE INTO overrides (key, value) VALUES (?, ?)",
+                                 (key, json.dumps(data[key])))
+            print(f"Imported {added} name mappings and {skipped} skip names from {path}.")
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('revision', '1')")
+
+    def _next_position(self, conn, table):
+        return conn.execute(f"SELECT COALESCE(MAX(position), 0) + 1 FROM {table}").fetchone()[0]
+
+    def _insert_mappings(self, conn, mappings):
+        position = self._next_position(conn, "name_mappings")
+        rows = []
+        for offset, item in enumerate(mappings):
+            original, mapped = item['original'].strip(), item['mapped'].strip()
+            key = normalize_name(original)
+            if key and mapped:
+                rows.append((key, original, mapped, position + offset))
+        before = conn.total_changes
+        # The first rule for a name wins, so later duplicates are ignored
+        conn.executemany("INSERT OR IGNORE INTO name_mappings (original_key, original, mapped, position) "
+                         "VALUES (?, ?, ?, ?)", rows)
+        return conn.total_changes - before
+
+    def _insert_skip_names(self, conn, names):
+        position = self._next_position(conn, "skip_names")
+        rows = [(normalize_name(name), name.strip(), position + offset)
+                for offset, name in enumerate(names) if normalize_name(name)]
+        before = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO skip_names (name_key, name, position) VALUES (?, ?, ?)", rows)
+        return conn.total_changes - before
+
+    def revision(self):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+        return int(row[0]) if row else 0
+
+    def mappings(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT original, mapped FROM name_mappings ORDER BY position").fetchall()
+        return [{"original": original, "mapped": mapped} for original, mapped in rows]
+
+    def skip_list(self):
+        with self._connect() as conn:
+            return [name for (name,) in conn.execute("SELECT name FROM skip_names ORDER BY position")]
+
+    def overrides(self):
+        with self._connect() as conn:
+            return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM overrides")}
+
+    def lookup_mapping(self, original):
+        with self._connect() as conn:
+            row = conn.execute("SELECT mapped FROM name_mappings WHERE original_key = ?",
+                               (normalize_name(original),)).fetchone()
+        return row[0] if row else None
+
+    def add_mapping(self, original, mapped):
+        """Add or replace the rule for original. Returns False if the input is blank."""
+        key = normalize_name(original)
+        if not key or not mapped.strip():
+            return False
+        with self._write() as conn:
+            conn.execute("INSERT INTO name_mappings (original_key, original, mapped, position) "
+                         "VALUES (?, ?, ?, (SELECT COALESCE(MAX(position), 0) + 1 FROM name_mappings)) "
+                         "ON CONFLICT (original_key) DO UPDATE SET original = excluded.original, "
+                         "mapped = excluded.mapped",
+                         (key, original.strip(), mapped.strip()))
+        return True
+
+    def remove_mapping(self, original):
+        with self._write() as conn:
+            return conn.execute("DELETE FROM name_mappings WHERE original_key = ?",
+                                (normalize_name(original),)).rowcount > 0
+
+    def add_skip_name(self, name):
+        with self._write() as conn:
+            return self._insert_skip_names(conn, [name]) > 0
+
+    def remove_skip_name(self, name):
+        with self._write() as conn:
+            return conn.execute("DELETE FROM skip_names WHERE name_key = ?", (normalize_name(name),)).rowcount > 0
+
+    def set_override(self, key, value):
+        with self._write() as conn:
+            conn.execute("INSERT OR REPLACE INTO overrides (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def apply_overrides(self, overrides):
+        """Make the stored overrides match overrides, writing only the keys that changed.
+
+        Raises ValueError for a key that is not in OVERRIDE_KEYS or a value
+        that is not an object. Returns (keys added or changed, keys removed).
+        """
+        for key, value in overrides.items():
+            if key not in OVERRIDE_KEYS:
+                raise ValueError(f"Unknown override '{key}'. Known overrides: {', '.join(OVERRIDE_KEYS)}")
+            if not isinstance(value, dict):
+                raise ValueError(f"Override '{key}' must be an object")
+
+        with self._write() as conn:
+            current = dict(conn.execute("SELECT key, value FROM overrides"))
+            removed = [(key,) for key in current.keys() - overrides.keys()]
+            changed = [(key, json.dumps(value)) for key, value in overrides.items()
+                       if key not in current or json.loads(current[key]) != value]
+            conn.executemany("DELETE FROM overrides WHERE key = ?", removed)
+            conn.executemany("INSERT OR REPLACE INTO overrides (key, value) VALUES (?, ?)", changed)
+        return len(changed), len(removed)
+
+    def apply_edits(self, mappings, skip_list):
+        """Make the stored rules match the edited lists, writing only the rows that changed.
+
+        Existing rules keep their place; new ones are appended. Returns
+        (rows added or changed, rows removed).
+        """
+        wanted_mappings = {}
+        for item in mappings:
+            key = normalize_name(item['original'])
+            if key and item['mapped'].strip() and key not in wanted_mappings:
+                wanted_mappings[key] = (item['original'].strip(), item['mapped'].strip())
+        wanted_skip = {}
+        for name in skip_list:
+            key = normalize_name(name)
+            if key and key not in wanted_skip:
+                wanted_skip[key] = name.strip()
+
+        with self._write() as conn:
+            current_mappings = {key: (original, mapped) for key, original, mapped
+                                in conn.execute("SELECT original_key, original, mapped FROM name_mappings")}
+            current_skip = dict(conn.execute("SELECT name_key, name FROM skip_names"))
+
+            removed_mappings = [(key,) for key in current_mappings.keys() - wanted_mappings.keys()]
+            removed_skip = [(key,) for key in current_skip.keys() - wanted_skip.keys()]
+            conn.executemany("DELETE FROM name_mappings WHERE original_key = ?", removed_mappings)
+            conn.executemany("DELETE FROM skip_names WHERE name_key = ?", removed_skip)
+
+            edited_mappings = [(original, mapped, key) for key, (original, mapped) in wanted_mappings.items()
+                               if key in current_mappings and current_mappings[key] != (original, mapped)]
+            conn.executemany("UPDATE name_mappings SET original = ?, mapped = ? WHERE original_key = ?",
+                             edited_mappings)
+            edited_skip = [(name, key) for key, name in wanted_skip.items()
+                           if key in current_skip and current_skip[key] != name]
+            conn.executemany("UPDATE skip_names SET name = ? WHERE name_key = ?", edited_skip)
+
+            added_mappings = self._insert_mappings(conn, [{"original": original, "mapped": mapped}
+                                                          for key, (original, mapped) in wanted_mappings.items()
+                                                          if key not in current_mappings])
+            added_skip = self._insert_skip_names(conn, [name for key, name in wanted_skip.items()
+                                                        if key not in current_skip])
+
+        changed = added_mappings + added_skip + len(edited_mappings) + len(edited_skip)
+        return changed, len(removed_mappings) + len(removed_skip)
+
+    def record_statement(self, statement_number, carrier, rows, total):
+        # History is not a setting, so the cached NameResolver stays valid
+        with self._write(bump_revision=False) as conn:
+            conn.execute("INSERT INTO statements (statement_number, statement_key, carrier, rows, total, submitted_at) "
+                         "VALUES (?, ?, ?, ?, ?, ?)",
+                         (statement_number, statement_key(statement_number), carrier, rows,
+                          None if total is None else format_amount(total), datetime.now().isoformat(timespec='seconds')))
+
+    def find_statements(self, statement_number):
+        """Earlier submissions of this statement number, newest first."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT statement_number, carrier, rows, total, submitted_at FROM statements "
+                                "WHERE statement_key = ? ORDER BY id DESC",
+                                (statement_key(statement_number),)).fetchall()
+        return [{"statementNumber": number, "carrier": carrier, "rows": count, "total": total,
+                 "submittedAt": submitted_at} for number, carrier, count, total, submitted_at in rows]
@@ -0,0 +1,89 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+GUI_SCRIPT = os.path.join(SCRIPT_DIR, 'worker-gui-ManualImport.py')
+
+# Milliseconds the GUI's module-level imports may take before the window is built
+STARTUP_BUDGET_MS = 1500
+# Packages the GUI loads in load_automation() after the window is up; any of
+# these showing up at startup is a regression regardless of the budget
+DEFERRED_MODULES = ("selenium", "fuzzywuzzy", "rapidfuzz", "numpy", "manual_import", "chrome_session",
+                    "carrier_cache", "producer_matching", "worker_pool")
+
+def startup_imports(script_path):
+    """The import statements that run at module level, before the window is created."""
+    with open(script_path, 'r', encoding='utf-8') as file:
+        tree = ast.parse(file.read(), script_path)
+    return [ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+
+def run_importtime(python, code):
+    """Run code under -X importtime and return [(module, self_us, cumulative_us, depth)]."""
+    completed = subprocess.run([python, '-X', 'importtime', '-c', code], cwd=SCRIPT_DIR,
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{completed.stderr.strip().splitlines()[-1]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+def measure(python, imports):
+    # Modules the interpreter loads before any user code (site, encodings, ...)
+    # are measured separately and left out
+    interpreter = {name for name, _, _, _ in run_importtime(python, 'pass')}
+    entries = [entry for entry in run_importtime(python, '\n'.join(imports)) if entry[0] not in interpreter]
+    top_level = [entry for entry in entries if entry[3] == min(e[3] for e in entries)] if entries else []
+    return {
+        "totalMs": sum(cumulative for _, _, cumulative, _ in top_level) / 1000,
+        "modules": {name: cumulative / 1000 for name, _, cumulative, _ in top_level},
+        "loaded": [name for name, _, _, _ in entries],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report how long the GUI's startup imports take.")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, help="allowed startup import time in ms")
+    parser.add_argument("--repeat", type=int, default=3, help="runs to measure; the fastest is reported")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--python", default=sys.executable, help="interpreter to measure")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    imports = startup_imports(GUI_SCRIPT)
+    try:
+        report = min((measure(args.python, imports) for _ in range(args.repeat)), key=lambda r: r["totalMs"])
+    except RuntimeError as e:
+        print(e)
+        return 1
+
+    print(f"Startup imports of {os.path.basename(GUI_SCRIPT)}:")
+    for name, ms in sorted(report["modules"].items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {ms:>9.1f} ms  {name}")
+    print(f"Total: {report['totalMs']:.1f} ms (budget {args.budget:.0f} ms)")
+
+    deferred = sorted({name for name in report["loaded"] if name.split('.')[0] in DEFERRED_MODULES})
+    failed = False
+    if deferred:
+        print(f"Loaded at startup but should be deferred: {', '.join(deferred)}")
+        failed = True
+    if report["totalMs"] > args.budget:
+        print(f"Startup imports are {report['totalMs'] - args.budget:.1f} ms over budget.")
+        failed = True
+
+    if args.output:
+        report.update({"budgetMs": args.budget, "deferredLoaded": deferred})
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=4)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
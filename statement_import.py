@@ -0,0 +1,192 @@
+import csv
+import os
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from name_resolver import normalize_name
+
+# Header names tried, in order, when no column is given explicitly. Headers
+# are compared after normalize_name folding.
+NAME_HEADERS = ("producer", "producer name", "agent", "agent name", "team member", "name")
+AMOUNT_HEADERS = ("amount", "commission", "commission amount", "agency commission", "net commission")
+
+MAX_REPORTED_PROBLEMS = 20
+
+class StatementImportError(ValueError):
+    """A statement failed validation. problems lists every issue found, not just the first."""
+
+    def __init__(self, problems):
+        message = "\n".join(problems[:MAX_REPORTED_PROBLEMS])
+        if len(problems) > MAX_REPORTED_PROBLEMS:
+            message += f"\n... and {len(problems) - MAX_REPORTED_PROBLEMS} more"
+        super().__init__(message)
+        self.problems = problems
+
+def parse_amount(value):
+    """Parse an amount exactly, accepting "$1,234.50", "(12.00)" and "12.00-" forms."""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value))
+
+    text = str(value).strip().replace('$', '').replace(',', '').replace(' ', '')
+    negative = False
+    if text.startswith('(') and text.endswith(')'):
+        negative, text = True, text[1:-1]
+    elif text.endswith('-'):
+        negative, text = True, text[:-1]
+
+    amount = Decimal(text)
+    if not amount.is_finite():
+        raise InvalidOperation(f"Not a finite amount: {value!r}")
+    return -amount if negative else amount
+
+def format_amount(amount):
+    """An amount as the page expects it: plain digits, never exponent notation like 1E+3."""
+    return format(parse_amount(amount), 'f')
+
+class StatementValidator:
+    """Single-pass accumulator that parses, totals and checks statement lines."""
+
+    def __init__(self, source):
+        self.source = source
+        self.names = []
+        self.amounts = []
+        self.total = Decimal(0)
+        self.problems = []
+        self._name_counts = Counter()
+        self._row_counts = Counter()
+
+    def add(self, line, name, raw_amount):
+        name = '' if name is None else str(name).strip()
+        if not name:
+            self.problems.append(f"Line {line}: missing name")
+            return
+        try:
+            amount = parse_amount(raw_amount)
+        except (InvalidOperation, ValueError, TypeError):
+            self.problems.append(f"Line {line}: invalid amount {raw_amount!r} for '{name}'")
+            return
+
+        self.names.append(name)
+        self.amounts.append(amount)
+        self.total += amount
+        key = normalize_name(name)
+        self._name_counts[key] += 1
+        self._row_counts[(key, amount)] += 1
+
+    def finish(self, expected_count=None, expected_total=None):
+        if not self.names and not self.problems:
+            self.problems.append("no data rows")
+        if expected_count is not None and len(self.names) != int(expected_count):
+            self.problems.append(f"Expected {expected_count} lines but found {len(self.names)}")
+        if expected_total is not None and self.total != parse_amount(expected_total):
+            self.problems.append(f"Expected a total of {parse_amount(expected_total)} but the lines add up to "
+                                 f"{self.total}")
+        if self.problems:
+            raise StatementImportError([f"{self.source}: {problem}" for problem in self.problems])
+
+        return {
+            "source": self.source,
+            "names": self.names,
+            "amounts": self.amounts,
+            "count": len(self.names),
+            "total": self.total,
+            # Repeated producers are legitimate, identical lines are more likely a double entry
+            "duplicateNames": sum(1 for count in self._name_counts.values() if count > 1),
+            "duplicateLines": sum(count - 1 for count in self._row_counts.values() if count > 1),
+        }
+
+def validate_lines(names, amounts, source="input", expected_count=None, expected_total=None):
+    """Validate names and amounts typed or pasted as parallel lists of lines."""
+    validator = StatementValidator(source)
+    if len(names) != len(amounts):
+        validator.problems.append(f"{len(names)} names but {len(amounts)} amounts")
+    for line, (name, amount) in enumerate(zip(names, amounts), start=1):
+        validator.add(line, name, amount)
+    return validator.finish(expected_count, expected_total)
+
+def _iter_rows(path, sheet=None):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise StatementImportError([f"{path}: reading {extension} files needs openpyxl (pip install openpyxl)"])
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet else workbook.active
+            yield from worksheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+        return
+
+    with open(path, 'r', newline='', encoding='utf-8-sig') as file:
+        sample = file.read(64 * 1024)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(file, dialect)
+
+def _find_column(keys, wanted, candidates):
+    if wanted is not None:
+        if isinstance(wanted, int) or str(wanted).isdigit():
+            return int(wanted)
+        key = normalize_name(str(wanted))
+        return keys.index(key) if key in keys else None
+    for candidate in candidates:
+        if candidate in keys:
+            return keys.index(candidate)
+    return None
+
+def _is_blank(row):
+    return not row or all(cell is None or str(cell).strip() == '' for cell in row)
+
+def load_statement_file(path, name_column=None, amount_column=None, sheet=None,
+                        expected_count=None, expected_total=None):
+    """Stream a CSV/TSV or XLSX commission export and validate it in one pass.
+
+    Columns are found by header name, or given explicitly as a header name or
+    zero-based index. A file without a recognised header is read as name,
+    amount in the first two columns. Raises StatementImportError listing
+    every bad line; returns the summary from StatementValidator.finish.
+    """
+    validator = StatementValidator(os.path.basename(path))
+    rows = enumerate(_iter_rows(path, sheet), start=1)
+
+    first_line, header = next(((line, row) for line, row in rows if not _is_blank(row)), (0, None))
+    if header is None:
+        raise StatementImportError([f"{path}: the file has no rows"])
+
+    keys = [normalize_name(str(cell or '')) for cell in header]
+    name_index = _find_column(keys, name_column, NAME_HEADERS)
+    amount_index = _find_column(keys, amount_column, AMOUNT_HEADERS)
+    if name_index is None and amount_index is None:
+        name_index, amount_index = 0, 1
+    elif name_index is None or amount_index is None:
+        missing = "name" if name_index is None else "amount"
+        raise StatementImportError([f"{path}: could not find the {missing} column in the header {list(header)}"])
+
+    # A first row whose amount cell parses is data, not a header
+    name, amount = _pick(header, name_index, amount_index)
+    if _is_amount(amount):
+        validator.add(first_line, name, amount)
+
+    for line, row in rows:
+        if not _is_blank(row):
+            validator.add(line, *_pick(row, name_index, amount_index))
+
+    return validator.finish(expected_count, expected_total)
+
+def _is_amount(value):
+    try:
+        parse_amount(value)
+        return value is not None
+    except (InvalidOperation, ValueError, TypeError):
+        return False
+
+def _pick(row, name_index, amount_index):
+    name = row[name_index] if name_index < len(row) else None
+    amount = row[amount_index] if amount_index < len(row) else None
+    return name, amount
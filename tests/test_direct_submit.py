@@ -0,0 +1,151 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+import pytest
+
+requests = pytest.importorskip("requests")
+
+from carrier_cache import CarrierCatalog
+from direct_submit import DATE_FORMAT, DirectSubmitError, DirectSubmitter, build_template
+from mock_ezlynx_server import CREATE_STATEMENT_PATH, SAVE_STATEMENT_PATH, default_producers, start_mock_server
+
+CARRIER = "Fortegra Specialty"
+CARRIER_VALUE = "1000"
+
+@pytest.fixture
+def server():
+    server = start_mock_server(producers=default_producers(5))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def site_url(server, path):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}{path}"
+
+def post(server, path, body):
+    """Send a request the way the page does and return it as CAPTURE_JS records it."""
+    text = json.dumps(body)
+    response = requests.post(site_url(server, path), data=text, headers={'content-type': 'application/json'})
+    return {"method": "POST", "url": site_url(server, path), "headers": {"content-type": "application/json"},
+            "body": text, "response": response.text}
+
+def page_state(server, row_producers):
+    return {
+        "url": server.add_statement_url,
+        "carrierValue": CARRIER_VALUE,
+        "producers": [[str(2000 + index), f"{name} (Producer)"] for index, name in enumerate(server.producers)],
+        "rowProducers": row_producers,
+        "hiddenInputs": {},
+    }
+
+def browser_submission(server, statement_number, comment, producers, amounts, create=True, **extra):
+    """The requests the mock page sends for one statement: create it, then save it with its rows."""
+    date = datetime.now().strftime(DATE_FORMAT)
+    captured = []
+    statement_id = 123456
+    if create:
+        captured.append(post(server, CREATE_STATEMENT_PATH, {"CarrierID": CARRIER_VALUE,
+                                                             "StatementNumber": statement_number,
+                                                             "StatementDate": date, "Comment": comment}))
+        statement_id = json.loads(captured[-1]["response"])["statementId"]
+    payload = {
+        "StatementID": statement_id,
+        "CarrierID": CARRIER_VALUE,
+        "StatementNumber": statement_number,
+        "StatementDate": date,
+        "Comment": comment,
+        "TransactionType": "PMT",
+        "TransactionDate": date,
+        "ServiceTeam": [{"ProducerID": producer, "Amount": amount} for producer, amount in zip(producers, amounts)],
+    }
+    payload.update(extra)
+    captured.append(post(server, SAVE_STATEMENT_PATH, payload))
+    return captured
+
+def make_submitter(tmp_path, template):
+    template_path = tmp_path / "template.json"
+    template_path.write_text(json.dumps(template))
+    session_path = tmp_path / "session.json"
+    session_path.write_text(json.dumps({"cookies": []}))
+    catalog = CarrierCatalog(str(tmp_path / "carrierCatalog.json"))
+    catalog.options = {CARRIER_VALUE: CARRIER}
+    return DirectSubmitter(str(template_path), str(session_path), catalog)
+
+def test_learned_template_replays_against_mock(server, tmp_path):
+    captured = browser_submission(server, "LEARN1", "Learned", ["2000", "2001"], ["10.00", "5.50"])
+    template = build_template(captured, page_state(server, ["2000", "2001"]), "LEARN1", "Learned",
+                              ["10.00", "5.50"])
+    learned_id = server.statements[-1]["StatementID"]
+
+    submitter = make_submitter(tmp_path, template)
+    names = [server.producers[2], server.producers[4], server.producers[2]]
+    submitter.submit(CARRIER, "DIRECT1", "Replayed", names, [Decimal("1.25"), Decimal("-3"), Decimal("7.10")])
+
+    replayed = server.statements[-1]
+    assert len(server.statements) == 2
+    assert replayed["StatementID"] != learned_id
+    assert replayed["StatementID"] in server.created
+    assert server.created[replayed["StatementID"]]["StatementNumber"] == "DIRECT1"
+    assert replayed["StatementNumber"] == "DIRECT1"
+    assert replayed["Comment"] == "Replayed"
+    assert replayed["CarrierID"] == CARRIER_VALUE
+    assert replayed["ServiceTeam"] == [{"ProducerID": "2002", "Amount": "1.25"},
+                                       {"ProducerID": "2004", "Amount": "-3"},
+                                       {"ProducerID": "2002", "Amount": "7.10"}]
+
+def test_unlinked_statement_id_is_refused(server):
+    captured = browser_submission(server, "LEARN2", "Learned", ["2000"], ["10.00"], create=False)
+    with pytest.raises(DirectSubmitError, match="StatementID"):
+        build_template(captured, page_state(server, ["2000"]), "LEARN2", "Learned", ["10.00"])
+
+def test_failure_after_a_post_is_marked_sent(server, tmp_path):
+    captured = browser_submission(server, "LEARN3", "Learned", ["2000"], ["10.00"])
+    template = build_template(captured, page_state(server, ["2000"]), "LEARN3", "Learned", ["10.00"])
+    # Point the final request somewhere the mock rejects, after the create POST succeeded
+    template["steps"][-1]["url"] = site_url(server, "/missing")
+    submitter = make_submitter(tmp_path, template)
+    with pytest.raises(DirectSubmitError) as error:
+        submitter.submit(CARRIER, "DIRECT3", "Replayed", [server.producers[0]], [Decimal("1")])
+    assert error.value.sent
+
+def test_failure_before_any_post_is_not_marked_sent(server, tmp_path):
+    captured = browser_submission(server, "LEARN4", "Learned", ["2000"], ["10.00"])
+    template = build_template(captured, page_state(server, ["2000"]), "LEARN4", "Learned", ["10.00"])
+    template["pageUrl"] = site_url(server, "/missing")
+    submitter = make_submitter(tmp_path, template)
+    with pytest.raises(DirectSubmitError) as error:
+        submitter.submit(CARRIER, "DIRECT4", "Replayed", [server.producers[0]], [Decimal("1")])
+    assert not error.value.sent
+
+def test_iso_dates_and_numeric_types_are_kept(server, tmp_path):
+    today = datetime.now()
+    captured = browser_submission(server, "LEARN5", "Learned", [2000, 2001], [10.5, 3],
+                                  TransactionDate=today.strftime('%Y-%m-%dT00:00:00'))
+    template = build_template(captured, page_state(server, ["2000", "2001"]), "LEARN5", "Learned", ["10.5", "3"])
+    submitter = make_submitter(tmp_path, template)
+    submitter.submit(CARRIER, "DIRECT5", "Replayed", [server.producers[1], server.producers[3]],
+                     [Decimal("2.25"), Decimal("1000")])
+
+    replayed = server.statements[-1]
+    assert replayed["TransactionDate"] == today.strftime('%Y-%m-%dT00:00:00')
+    assert replayed["ServiceTeam"] == [{"ProducerID": 2001, "Amount": 2.25}, {"ProducerID": 2003, "Amount": 1000.0}]
+
+def test_date_that_is_not_today_is_refused(server):
+    captured = browser_submission(server, "LEARN6", "Learned", ["2000"], ["10.00"],
+                                  EffectiveDate="2020-01-31T00:00:00")
+    with pytest.raises(DirectSubmitError, match="EffectiveDate"):
+        build_template(captured, page_state(server, ["2000"]), "LEARN6", "Learned", ["10.00"])
+
+def test_token_header_is_linked_to_hidden_input(server):
+    captured = browser_submission(server, "LEARN7", "Learned", ["2000"], ["10.00"])
+    captured[-1]["headers"]["requestverificationtoken"] = "abcdef123456"
+    state = page_state(server, ["2000"])
+    state["hiddenInputs"] = {"__RequestVerificationToken": "abcdef123456"}
+    template = build_template(captured, state, "LEARN7", "Learned", ["10.00"])
+    final = template["steps"][-1]
+    assert {"target": ["header", "requestverificationtoken"],
+            "source": ["page", "__RequestVerificationToken"]} in final["links"]
+    assert {"target": ["body", ["StatementID"]], "source": ["response", 0, ["statementId"]]} in final["links"]
+    assert final["team"]["path"] == ["ServiceTeam"]
+    assert final["body"]["ServiceTeam"] == []
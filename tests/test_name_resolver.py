@@ -0,0 +1,54 @@
+from decimal import Decimal
+from name_resolver import NameResolver, aggregate_team, normalize_name
+
+def mappings(*pairs):
+    return [{"original": original, "mapped": mapped} for original, mapped in pairs]
+
+def test_normalize_name_folds_case_accents_punctuation_and_spaces():
+    assert normalize_name("  Marc  St. Julien ") == "marc st julien"
+    assert normalize_name("José O'Neil") == "jose oneil"
+
+def test_chain_is_followed_to_the_end():
+    resolver = NameResolver(mappings(("A Smith", "Bob Smith"), ("Bob Smith", "Robert Smith")), [])
+    assert resolver.resolve("a  smith") == ("Robert Smith", ["a smith", "bob smith"])
+    assert resolver.resolve("Bob Smith") == ("Robert Smith", ["bob smith"])
+
+def test_first_rule_for_a_name_wins():
+    resolver = NameResolver(mappings(("Tony", "Anthony R"), ("TONY", "Someone Else")), [])
+    assert resolver.resolve("Tony")[0] == "Anthony R"
+
+def test_spelling_fix_rule_is_applied():
+    resolver = NameResolver(mappings(("Marc St. Julien", "Marc St Julien"), ("ANTHONY R", "Anthony R"),
+                                     ("Tony", "anthony r")), [])
+    assert resolver.resolve("Marc St. Julien") == ("Marc St Julien", ["marc st julien"])
+    assert resolver.resolve("ANTHONY R") == ("Anthony R", ["anthony r"])
+    assert resolver.resolve("Tony") == ("Anthony R", ["tony", "anthony r"])
+    assert resolver.cycles == []
+
+def test_cycle_is_reported_and_left_unmapped():
+    resolver = NameResolver(mappings(("X One", "Y Two"), ("Y Two", "X One"), ("Z", "X One")), [])
+    assert resolver.cycles == [["x one", "y two", "x one"]]
+    assert resolver.resolve("X One") == ("X One", [])
+    assert resolver.resolve("Z") == ("Z", [])
+
+def test_unmapped_name_is_returned_stripped():
+    assert NameResolver([], []).resolve("  Nobody ") == ("Nobody", [])
+
+def test_resolve_team_skips_after_mapping():
+    resolver = NameResolver(mappings(("Old Name", "House Account")), ["house account"])
+    report = resolver.resolve_team(["Old Name", "Jane Doe"], [Decimal("1"), Decimal("2")])
+    assert report["team_list"] == ["Jane Doe"]
+    assert report["amount_list"] == [Decimal("2")]
+    assert report["remapped"] == 1
+    assert report["skipped"] == 1
+    assert report["rows"][0]["resolved"] == "House Account"
+
+def test_aggregate_team_sums_exactly_and_records_lines():
+    resolver = NameResolver(mappings(("J Doe", "Jane Doe")), ["Skip Me"])
+    report = resolver.resolve_team(["Jane Doe", "Bob", "J Doe", "Skip Me", "jane doe"],
+                                   [Decimal("0.10"), Decimal("5"), Decimal("0.20"), Decimal("9"), Decimal("-0.05")])
+    merged = aggregate_team(report)
+    assert merged["team_list"] == ["Jane Doe", "Bob"]
+    assert merged["amount_list"] == [Decimal("0.25"), Decimal("5")]
+    assert merged["merges"] == [{"name": "Jane Doe", "amount": Decimal("0.25"), "lines": [1, 3, 5]}]
+    assert report["team_list"] == ["Jane Doe", "Bob", "Jane Doe", "jane doe"]
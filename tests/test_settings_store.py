@@ -0,0 +1,70 @@
+import json
+import os
+import pytest
+from settings_store import SettingsStore
+
+def write_json(path, data, mtime):
+    path.write_text(json.dumps(data))
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+@pytest.fixture
+def store(tmp_path):
+    return SettingsStore(str(tmp_path / "settings.db"))
+
+def test_migration_imports_every_legacy_file_newest_first(tmp_path):
+    older = write_json(tmp_path / "old.json", {"nameMappings": [{"original": "Tony", "mapped": "Old Target"},
+                                                                {"original": "Bob", "mapped": "Robert"}],
+                                               "skipList": ["House"], "bulkRows": {"chunkSize": 10}}, 1000)
+    newer = write_json(tmp_path / "new.json", {"nameMappings": [{"original": "tony", "mapped": "Anthony R"}],
+                                               "skipList": ["house", "Agency"]}, 2000)
+    store = SettingsStore(str(tmp_path / "settings.db"), [older, newer, str(tmp_path / "missing.json")])
+    assert store.mappings() == [{"original": "tony", "mapped": "Anthony R"}, {"original": "Bob", "mapped": "Robert"}]
+    assert store.skip_list() == ["house", "Agency"]
+    assert store.overrides() == {"bulkRows": {"chunkSize": 10}}
+
+    # Migration runs once; a later edit to the JSON is not imported again
+    write_json(tmp_path / "new.json", {"nameMappings": [{"original": "Zed", "mapped": "Zed Z"}]}, 3000)
+    assert SettingsStore(store.db_path, [older, newer]).lookup_mapping("Zed") is None
+
+def test_apply_edits_writes_only_changes_and_keeps_positions(store):
+    store.apply_edits([{"original": "A", "mapped": "1"}, {"original": "B", "mapped": "2"},
+                       {"original": "C", "mapped": "3"}], ["X", "Y"])
+    changed, removed = store.apply_edits([{"original": "A", "mapped": "1"}, {"original": "C", "mapped": "33"},
+                                          {"original": "D", "mapped": "4"}, {"original": "a", "mapped": "dup"}],
+                                         ["Y", "Z"])
+    assert (changed, removed) == (3, 2)
+    assert store.mappings() == [{"original": "A", "mapped": "1"}, {"original": "C", "mapped": "33"},
+                                {"original": "D", "mapped": "4"}]
+    assert store.skip_list() == ["Y", "Z"]
+
+def test_revision_changes_only_when_settings_change(store):
+    store.apply_edits([{"original": "A", "mapped": "1"}], ["X"])
+    revision = store.revision()
+    assert store.apply_edits([{"original": "A", "mapped": "1"}], ["X"]) == (0, 0)
+    assert store.revision() == revision
+
+    store.record_statement("ST-1", "Carrier", 2, None)
+    assert store.revision() == revision
+
+    store.add_mapping("B", "2")
+    assert store.revision() == revision + 1
+
+def test_apply_overrides(store):
+    assert store.apply_overrides({"bulkRows": {"chunkSize": 50}}) == (1, 0)
+    assert store.apply_overrides({"bulkRows": {"chunkSize": 50}}) == (0, 0)
+    assert store.overrides() == {"bulkRows": {"chunkSize": 50}}
+    with pytest.raises(ValueError):
+        store.apply_overrides({"unknown": {}})
+    with pytest.raises(ValueError):
+        store.apply_overrides({"bulkRows": 5})
+    assert store.apply_overrides({}) == (0, 1)
+    assert store.overrides() == {}
+
+def test_statement_history_is_found_case_insensitively(store):
+    store.record_statement("ST-100", "Fortegra", 3, "1e3")
+    store.record_statement("st-100 ", "Fortegra", 4, "12.50")
+    earlier = store.find_statements("St-100")
+    assert [entry["rows"] for entry in earlier] == [4, 3]
+    assert earlier[1]["total"] == "1000"
+    assert store.find_statements("ST-101") == []
@@ -0,0 +1,82 @@
+from decimal import Decimal
+import pytest
+from statement_import import StatementImportError, format_amount, load_statement_file, parse_amount, validate_lines
+
+@pytest.mark.parametrize("text, expected", [
+    ("12.50", Decimal("12.50")),
+    ("$1,234.50", Decimal("1234.50")),
+    ("(12.00)", Decimal("-12.00")),
+    ("12.00-", Decimal("-12.00")),
+    (" -3 ", Decimal("-3")),
+    (7, Decimal("7")),
+    (0.1, Decimal("0.1")),
+])
+def test_parse_amount(text, expected):
+    assert parse_amount(text) == expected
+
+@pytest.mark.parametrize("text", ["", "abc", "NaN", "Infinity", None])
+def test_parse_amount_rejects(text):
+    with pytest.raises(Exception):
+        parse_amount(text)
+
+def test_format_amount_never_uses_exponent_notation():
+    assert format_amount("1e3") == "1000"
+    assert format_amount(Decimal("1E-2")) == "0.01"
+    assert format_amount("$1,234.50") == "1234.50"
+
+def test_validate_lines_reports_every_problem():
+    with pytest.raises(StatementImportError) as error:
+        validate_lines(["Jane", "", "Bob"], ["1", "2", "x"])
+    assert error.value.problems == ["input: Line 2: missing name", "input: Line 3: invalid amount 'x' for 'Bob'"]
+
+def test_validate_lines_checks_expected_count_and_total():
+    with pytest.raises(StatementImportError) as error:
+        validate_lines(["Jane", "Bob"], ["1", "2"], expected_count=3, expected_total="4")
+    assert len(error.value.problems) == 2
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+def test_csv_columns_found_by_header(tmp_path):
+    path = write(tmp_path, "export.csv", "Policy,Agent Name,Net Commission\nP1,Jane Doe,\"$1,000.00\"\n"
+                                         "P2,Bob,(5.00)\nP3,Jane Doe,\"$1,000.00\"\n")
+    lines = load_statement_file(path, expected_count=3, expected_total="1995")
+    assert lines["names"] == ["Jane Doe", "Bob", "Jane Doe"]
+    assert lines["amounts"] == [Decimal("1000.00"), Decimal("-5.00"), Decimal("1000.00")]
+    assert lines["total"] == Decimal("1995.00")
+    assert lines["duplicateNames"] == 1
+    assert lines["duplicateLines"] == 1
+
+def test_headerless_and_semicolon_files(tmp_path):
+    lines = load_statement_file(write(tmp_path, "plain.csv", "Jane Doe;10.00\nBob;2.50\n"))
+    assert lines["names"] == ["Jane Doe", "Bob"]
+    assert lines["count"] == 2
+
+def test_header_only_file_has_no_data_rows(tmp_path):
+    with pytest.raises(StatementImportError, match="no data rows"):
+        load_statement_file(write(tmp_path, "empty.csv", "Name,Amount\n"))
+
+def test_missing_amount_column_is_reported(tmp_path):
+    with pytest.raises(StatementImportError, match="amount column"):
+        load_statement_file(write(tmp_path, "names.csv", "Producer,Policy\nJane,P1\n"))
+
+def test_bad_lines_are_reported_with_line_numbers(tmp_path):
+    path = write(tmp_path, "bad.csv", "Name,Amount\nJane,1\n,2\nBob,oops\n")
+    with pytest.raises(StatementImportError) as error:
+        load_statement_file(path)
+    assert error.value.problems == ["bad.csv: Line 3: missing name", "bad.csv: Line 4: invalid amount 'oops' for 'Bob'"]
+
+def test_xlsx_file(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(["Producer", "Amount"])
+    sheet.append(["Jane Doe", 12.5])
+    sheet.append(["Bob", 3])
+    path = str(tmp_path / "export.xlsx")
+    workbook.save(path)
+    lines = load_statement_file(path)
+    assert lines["names"] == ["Jane Doe", "Bob"]
+    assert lines["amounts"] == [Decimal("12.5"), Decimal("3")]
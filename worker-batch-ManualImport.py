@@ -0,0 +1,205 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from manual_import import (
+    RUN_LOG_PATH,
+    create_user_data_directory,
+    enter_statement,
+    get_direct_submitter,
+    get_settings_store,
+    learn_direct_submission,
+    load_settings,
+    prepare_team,
+    read_lines,
+    record_outcome,
+    submit_directly,
+    submit_statement,
+    wait_for_add_click,
+)
+from run_timing import RunTimer
+from settings_store import statement_key
+from statement_import import StatementImportError, load_statement_file, validate_lines
+from worker_pool import default_worker_count, run_pool
+
+def load_statements(path):
+    """Load statements from a JSON manifest, or from every *.json file in a directory.
+
+    Each statement is an object with "carrier", "statement_number" and
+    "comment", plus either "names_file" and "amounts_file" or a CSV/XLSX
+    export in "file" (with optional "name_column", "amount_column", "sheet",
+    "expected_count" and "expected_total"). "aggregate": true combines repeated
+    producers for that statement alone. File paths are relative to the JSON
+    file that lists them.
+    """
+    if os.path.isdir(path):
+        manifest_files = sorted(glob.glob(os.path.join(path, '*.json')))
+    else:
+        manifest_files = [path]
+
+    statements = []
+    for manifest_file in manifest_files:
+        with open(manifest_file, 'r', encoding='utf-8') as file:
+            entries = json.load(file)
+        if isinstance(entries, dict):
+            entries = [entries]
+
+        base_dir = os.path.dirname(os.path.abspath(manifest_file))
+        for entry in entries:
+            statement = dict(entry)
+            statement["carrier"] = entry["carrier"].strip()
+            statement["comment"] = entry.get("comment", "")
+            for key in ("file", "names_file", "amounts_file"):
+                if key in entry:
+                    statement[key] = os.path.join(base_dir, entry[key])
+            statements.append(statement)
+    return statements
+
+def read_statement_lines(statement):
+    """Read and validate a statement's lines. Raises StatementImportError."""
+    if "file" in statement:
+        return load_statement_file(statement["file"], statement.get("name_column"), statement.get("amount_column"),
+                                   statement.get("sheet"), statement.get("expected_count"),
+                                   statement.get("expected_total"))
+    return validate_lines(read_lines(statement["names_file"]), read_lines(statement["amounts_file"]),
+                          os.path.basename(statement["names_file"]), statement.get("expected_count"),
+                          statement.get("expected_total"))
+
+def validate_statements(statements, allow_duplicates=False):
+    """Load every statement's lines up front, so bad input fails before Chrome starts.
+
+    Unless allow_duplicates is set, a statement number that appears twice in
+    the batch or was already submitted is also a problem.
+    """
+    problems = []
+    store = get_settings_store()
+    seen = set()
+    for statement in statements:
+        number = statement['statement_number']
+        if not allow_duplicates:
+            if statement_key(number) in seen:
+                problems.append(f"Statement {number}: listed more than once in this batch")
+            seen.add(statement_key(number))
+            earlier = store.find_statements(number)
+            if earlier:
+                problems.append(f"Statement {number}: already submitted on {earlier[0]['submittedAt']} "
+                                f"({earlier[0]['carrier']}, {earlier[0]['rows']} rows, total {earlier[0]['total']})")
+        try:
+            statement["lines"] = read_statement_lines(statement)
+        except (StatementImportError, OSError) as e:
+            problems.append(f"Statement {statement['statement_number']}:\n{e}")
+            continue
+        lines = statement["lines"]
+        print(f"Statement {statement['statement_number']}: {lines['count']} lines, total {lines['total']}, "
+              f"{lines['duplicateNames']} repeated names, {lines['duplicateLines']} identical lines.")
+    return problems
+
+def run_statement(session, statement, resolver, auto_submit, timer, direct=False, aggregate=False):
+    report = prepare_team(statement["lines"]["names"], statement["lines"]["amounts"], resolver,
+                          aggregate or statement.get("aggregate", False))
+    team_list, amount_list = report["team_list"], report["amount_list"]
+
+    result = None
+    try:
+        if direct and submit_directly(statement["carrier"], statement["statement_number"], statement["comment"],
+                                      team_list, amount_list, timer):
+            timer.counts["submission"] = "direct"
+        else:
+            driver = session.acquire(timer)
+            result = enter_statement(driver, statement["carrier"], statement["statement_number"], statement["comment"],
+                                     team_list, amount_list, timer, capture=direct)
+
+            if auto_submit:
+                if not result["verify"]["ok"]:
+                    raise RuntimeError(f"{len(result['verify']['mismatches'])} verification problem(s); not submitted")
+                with timer.span("submit"):
+                    submit_statement(driver)
+            else:
+                print(f"Review statement {statement['statement_number']} in the browser and click Add to continue.")
+                with timer.span("add_click_wait"):
+                    timer.counts["submission"] = wait_for_add_click(driver)
+            if direct:
+                learn_direct_submission(driver, result, statement["statement_number"], statement["comment"],
+                                        amount_list)
+        get_settings_store().record_statement(statement["statement_number"], statement["carrier"], len(team_list),
+                                              sum(amount_list))
+    finally:
+        record_outcome(timer, report, result)
+    return len(team_list)
+
+def print_summary(results, wall_time):
+    print("\nSummary")
+    print(f"{'Statement':<20} {'Carrier':<30} {'Worker':>6} {'Rows':>5} {'Seconds':>8}  Status")
+    for result in results:
+        print(f"{result['statement_number']:<20} {result['carrier'][:30]:<30} {result['worker']:>6} "
+              f"{result['rows']:>5} {result['elapsed']:>8.1f}  {result['status']}")
+    total = sum(result['elapsed'] for result in results)
+    failed = sum(1 for result in results if result['status'] != 'ok')
+    print(f"{len(results)} statements ({total:.1f}s of work) in {wall_time:.1f}s, {failed} failed.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Enter many EzLynx statements through one or more reused browser sessions.")
+    parser.add_argument("statements", help="JSON manifest file, or a directory of statement JSON files")
+    parser.add_argument("--settings",
+                        help="combinedData.json to use instead of the name mappings and skip list in User Data")
+    parser.add_argument("--allow-duplicates", action="store_true",
+                        help="enter statements even if their number was already submitted")
+    parser.add_argument("--auto-submit", action="store_true",
+                        help="click Add automatically instead of waiting for a review click")
+    parser.add_argument("--direct", action="store_true",
+                        help="submit over HTTP once a browser submission has taught the request, "
+                             "falling back to the browser when that fails")
+    parser.add_argument("--aggregate", action="store_true",
+                        help="combine repeated producers into one row with the summed amount")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of Chrome workers, each with its own profile copy (0 = one per CPU core)")
+    parser.add_argument("--refresh-profiles", action="store_true",
+                        help="copy User Data into the worker profiles again instead of reusing the old copies")
+    args = parser.parse_args(argv)
+
+    statements = load_statements(args.statements)
+    if not statements:
+        print(f"No statements found in {args.statements}.")
+        return 1
+
+    problems = validate_statements(statements, args.allow_duplicates)
+    if problems:
+        print("\nNothing was submitted. Fix these statements first:")
+        for problem in problems:
+            print(problem)
+        return 1
+
+    create_user_data_directory()
+    _, resolver = load_settings(args.settings)
+
+    workers = args.workers if args.workers > 0 else default_worker_count(len(statements))
+    workers = min(workers, len(statements))
+    if args.direct:
+        get_direct_submitter(pool_size=workers)
+
+    def process_statement(session, statement, worker_index):
+        print(f"\n[worker {worker_index}] {statement['carrier']} {statement['statement_number']}")
+        timer = RunTimer(statement["statement_number"], statement["carrier"])
+        timer.counts["worker"] = worker_index
+        result = {"statement_number": statement["statement_number"], "carrier": statement["carrier"],
+                  "rows": 0, "worker": worker_index}
+        try:
+            result["rows"] = run_statement(session, statement, resolver, args.auto_submit, timer, args.direct,
+                                           args.aggregate)
+            result["status"] = "ok"
+        except Exception as e:
+            print(f"Error entering statement {statement['statement_number']}: {e}")
+            result["status"] = f"failed: {e.__class__.__name__}"
+        timer.finish(RUN_LOG_PATH, result["status"])
+        result["elapsed"] = timer.elapsed()
+        return result
+
+    start = time.perf_counter()
+    results = run_pool(statements, process_statement, workers, args.refresh_profiles)
+    print_summary(results, time.perf_counter() - start)
+    return 0 if all(result["status"] == "ok" for result in results) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
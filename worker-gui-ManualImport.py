@@ -1,100 +1,25 @@
-import os
+import json
 import tkinter as tk
+from tkinter import filedialog
 import customtkinter as ctk
-from fuzzywuzzy import process
 import threading
-import json
 import time
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from run_events import RunCancelled, RunEvents
+from run_timing import RunTimer
+from statement_import import StatementImportError, load_statement_file, validate_lines
 
 file_path = ""
-
-def create_user_data_directory():
-    """Create the User Data directory if it does not exist."""
-    user_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'User Data')
-    if not os.path.exists(user_data_dir):
-        os.makedirs(user_data_dir)
-
-def wait_for_login(driver, wait):
-    login_button_selector = By.ID, 'btnLogin'
-    target_url = 'https://app.ezlynx.com/applicantportal/Commissions/DirectBill/AddStatement'
-
-    while True:
-        current_url = driver.current_url
-        if current_url == target_url:
-            print('Target URL reached. Refreshing the page twice.')
-            driver.refresh()
-            break
-
-        try:
-            # Check if login button is present
-            wait.until(EC.presence_of_element_located(login_button_selector))
-            print('Login button found. Please log in.')
-            time.sleep(5)
-        except Exception:
-            print('Login button not found or another issue.')
-            time.sleep(5)
-
-def read_combined_json_file(file_path):
-    try:
-        with open(file_path, 'r') as file:
-            return json.load(file)
-    except Exception as e:
-        print(f"Error reading JSON file {file_path}: {e}")
-        return {"nameMappings": [], "skipList": []}
-
-def write_combined_json_file(file_path, data):
-    try:
-        with open(file_path, 'w') as file:
-            json.dump(data, file, indent=4)
-    except Exception as e:
-        print(f"Error writing JSON file {file_path}: {e}")
-
-def apply_name_mappings(team_list, mappings):
-    mapped_list = []
-    for name in team_list:
-        mapped_name = next((item['mapped'] for item in mappings if item['original'] == name), name)
-        if mapped_name != name:
-            print(f"Remapping '{name}' to '{mapped_name}'")
-        mapped_list.append(mapped_name)
-    return mapped_list
-
-def select_closest_option(driver, dropdown_id, user_input):
-    # Locate the dropdown
-    select_element = driver.find_element(By.ID, dropdown_id)
-
-    # Find all option elements within the dropdown
-    options = select_element.find_elements(By.TAG_NAME, 'option')
-    
-    # Extract and filter option texts
-    option_texts = [option.text.strip() for option in options if not option.text.strip().endswith("(private)")]
-
-    # Find the closest match using fuzzy matching
-    closest_match, score = process.extractOne(user_input, option_texts)
-
-    # Print closest match and its score
-    print(f"Closest match: '{closest_match}' with a score of {score}")
-
-    # Select the closest match if the score is above a threshold (e.g., 80)
-    if score >= 80:
-        # Re-fetch the options to get the full list again
-        options = select_element.find_elements(By.TAG_NAME, 'option')
-        # Find the exact option that matches the closest match
-        for option in options:
-            if option.text.strip() == closest_match:
-                option.click()
-                print(f"Selected option: {closest_match}")
-                return
-        print(f"Option '{closest_match}' not found in the dropdown.")
-    else:
-        print(f"No suitable match found for '{user_input}'.")
+# Created by load_automation(); importing Selenium and the fuzzy matchers is
+# what made the window slow to appear, so it happens after the window is up
+chrome_session = None
+automation_lock = threading.Lock()
+imported_statement = None
+run_events = None
+
+# How often the Tk thread drains worker events (~60 fps), and the most it
+# handles per tick so a burst of events never stalls a redraw
+EVENT_POLL_MS = 16
+MAX_EVENTS_PER_TICK = 200
 
 def show_custom_message(title, message, icon=None):
     global app  # Ensure app is accessible here
@@ -141,185 +66,291 @@ def show_custom_message(title, message, icon=None):
     message_window.update_idletasks()
     message_window.lift()  # Bring the window to the front
 
+def show_confirm_message(title, message):
+    # Blocks until the user answers; returns True for Yes
+    answer = {"yes": False}
+    confirm_window = ctk.CTkToplevel(app)
+    confirm_window.title(title)
+    confirm_window.attributes('-topmost', True)
+    confirm_window.transient(app)
+    confirm_window.update_idletasks()
+
+    prompt_width = 340
+    prompt_height = 170
+    prompt_x = app.winfo_rootx() + (app.winfo_width() - prompt_width) // 2
+    prompt_y = app.winfo_rooty() + (app.winfo_height() - prompt_height) // 2
+    confirm_window.geometry(f"{prompt_width}x{prompt_height}+{prompt_x}+{prompt_y}")
+
+    def choose(yes):
+        answer["yes"] = yes
+        confirm_window.destroy()
+
+    message_label = ctk.CTkLabel(confirm_window, text=message, padx=10, pady=10, wraplength=prompt_width - 20)
+    message_label.pack(pady=(10, 5))
+    button_frame = ctk.CTkFrame(confirm_window, fg_color="transparent")
+    button_frame.pack(pady=(0, 10))
+    ctk.CTkButton(button_frame, text="Yes", width=100, command=lambda: choose(True)).pack(side="left", padx=5)
+    ctk.CTkButton(button_frame, text="No", width=100, command=lambda: choose(False)).pack(side="left", padx=5)
+
+    confirm_window.lift()
+    confirm_window.grab_set()
+    app.wait_window(confirm_window)
+    return answer["yes"]
+
+def show_verification_report(report):
+    # Lists what the read-back found wrong, while the user can still fix it before clicking Add
+    report_window = ctk.CTkToplevel(app)
+    report_window.title("Check before clicking Add")
+    report_window.attributes('-topmost', True)
+    report_window.transient(app)
+    report_window.update_idletasks()
+
+    report_width = 500
+    report_height = 350
+    report_x = app.winfo_rootx() + (app.winfo_width() - report_width) // 2
+    report_y = app.winfo_rooty() + (app.winfo_height() - report_height) // 2
+    report_window.geometry(f"{report_width}x{report_height}+{report_x}+{report_y}")
+
+    summary = (f"{len(report['mismatches'])} problem(s) on the page. {report['rows']} rows, "
+               f"total {report['total']} (expected {report['expectedTotal']}).")
+    summary_label = ctk.CTkLabel(report_window, text=summary, padx=10, pady=10, wraplength=report_width - 20)
+    summary_label.pack(pady=(10, 5))
+
+    mismatches_text = ctk.CTkTextbox(report_window, wrap="word")
+    mismatches_text.insert("1.0", '\n'.join(report['mismatches']))
+    mismatches_text.configure(state='disabled')
+    mismatches_text.pack(padx=10, pady=(0, 10), fill="both", expand=True)
+
+    close_button = ctk.CTkButton(report_window, text="OK", command=report_window.destroy)
+    close_button.pack(pady=(0, 10))
+    report_window.lift()
+
+
+def load_automation():
+    """Import the browser automation modules once and return the shared ChromeSession."""
+    global chrome_session
+    with automation_lock:
+        if chrome_session is None:
+            start = time.perf_counter()
+            from chrome_session import ChromeSession
+            chrome_session = ChromeSession()
+            print(f"Loaded automation modules in {time.perf_counter() - start:.1f}s.")
+    return chrome_session
+
+def prewarm_automation():
+    # Runs once the window is showing, so Start is instant by the time it is clicked
+    threading.Thread(target=load_automation, name='prewarm', daemon=True).start()
 
 def start_script():
     # Disable UI elements
     disable_main_window_widgets()
 
+    session = load_automation()
+    from manual_import import (
+        RUN_LOG_PATH,
+        create_user_data_directory,
+        enter_statement,
+        get_settings_store,
+        learn_direct_submission,
+        load_settings,
+        prepare_team,
+        record_outcome,
+        submit_directly,
+        wait_for_add_click,
+    )
+
     create_user_data_directory()
 
-    # Get the content from text areas
-    names = names_text_area.get("1.0", tk.END).strip().split('\n')
-    amounts = amounts_text_area.get("1.0", tk.END).strip().split('\n')
+    if imported_statement is not None:
+        lines = imported_statement
+    else:
+        # Get the content from text areas
+        names = names_text_area.get("1.0", tk.END).strip().split('\n')
+        amounts = amounts_text_area.get("1.0", tk.END).strip().split('\n')
 
-    if len(names) != len(amounts):
-        show_custom_message("Error", "Names and amounts must have the same number of lines.")
-        enable_main_window_widgets()
-        return
+        if len(names) != len(amounts):
+            show_custom_message("Error", "Names and amounts must have the same number of lines.")
+            enable_main_window_widgets()
+            return
+
+        try:
+            lines = validate_lines(names, amounts)
+        except StatementImportError as e:
+            show_custom_message("Error", str(e))
+            enable_main_window_widgets()
+            return
 
     statement_number = statement_number_entry.get()
     comment = comment_entry.get()
     desired_carrier = carrier_name_entry.get().strip()
 
-    combined_file_path = os.path.join(user_data_dir, 'combinedData.json')
+    earlier = get_settings_store().find_statements(statement_number)
+    if earlier and not show_confirm_message("Duplicate statement", f"Statement {statement_number} was already "
+                                            f"submitted on {earlier[0]['submittedAt']} ({earlier[0]['rows']} rows). "
+                                            f"Enter it anyway?"):
+        enable_main_window_widgets()
+        return
+
+    _, resolver = load_settings()
 
-    data = read_combined_json_file(combined_file_path)
-    name_mappings = data.get("nameMappings", [])
-    skip_list = data.get("skipList", [])
+    report = prepare_team(lines["names"], lines["amounts"], resolver, aggregate_var.get())
+    filtered_team_list, filtered_amount_list = report["team_list"], report["amount_list"]
 
-    team_list = apply_name_mappings(names, name_mappings)
-    amount_list = [float(amount) for amount in amounts]
+    direct = direct_submit_var.get()
 
-    filtered_team_list = []
-    filtered_amount_list = []
-    for name, amount in zip(team_list, amount_list):
-        if name not in skip_list:
-            filtered_team_list.append(name)
-            filtered_amount_list.append(amount)
-        else:
-            print(f"Removed: Name '{name}', Amount '{amount}'")
+    global run_events
+    run_events = events = RunEvents()
+    timer = RunTimer(statement_number, desired_carrier, events)
 
-    if len(filtered_team_list) != len(filtered_amount_list):
-        print("Error: TeamList and AmountList must have the same length.")
-        enable_main_window_widgets()
+    def run_script():
+        # Runs off the Tk thread: it reports through events and never touches a widget
+        status = "failed"
+        result = None
+        try:
+            if direct and submit_directly(desired_carrier, statement_number, comment,
+                                          filtered_team_list, filtered_amount_list, timer):
+                timer.counts["submission"] = "direct"
+            else:
+                driver = session.acquire(timer)
+
+                result = enter_statement(driver, desired_carrier, statement_number, comment,
+                                         filtered_team_list, filtered_amount_list, timer, capture=direct)
+
+                with timer.span("add_click_wait"):
+                    events.post("verify", report=result["verify"])
+                    outcome = wait_for_add_click(driver, events)
+                timer.counts["submission"] = outcome
+                if direct:
+                    learn_direct_submission(driver, result, statement_number, comment, filtered_amount_list)
+                print("Statement submitted. Keeping Chrome open for the next run.")
+
+            get_settings_store().record_statement(statement_number, desired_carrier, len(filtered_team_list),
+                                                  sum(filtered_amount_list))
+            status = "ok"
+
+        except RunCancelled:
+            print("Run cancelled.")
+            status = "cancelled"
+        except Exception as e:
+            print(f"Run failed: {e}")
+            events.error(str(e))
+        finally:
+            record_outcome(timer, report, result)
+            timer.finish(RUN_LOG_PATH, status)
+            events.finished(status)
+
+    progress_bar.set(0)
+    cancel_button.configure(state='normal', text="Cancel")
+    script_thread = threading.Thread(target=run_script, daemon=True)
+    script_thread.start()
+    drain_run_events(timer, events)
+
+def drain_run_events(timer, events, progress_text=""):
+    finished = None
+    progress = None
+    for event in events.drain(MAX_EVENTS_PER_TICK):
+        if event["kind"] == "progress":
+            # Only the latest progress matters for the redraw
+            progress = event
+        elif event["kind"] == "phase":
+            progress_text = ""
+            if event["phase"] in ("row_creation", "row_fill"):
+                progress_bar.set(0)
+        elif event["kind"] == "verify":
+            report = event["report"]
+            if report["ok"]:
+                progress_text = f" ({report['rows']} rows verified, total {report['total']}, click Add)"
+            else:
+                progress_text = f" ({len(report['mismatches'])} problem(s) found, check before clicking Add)"
+                show_verification_report(report)
+        elif event["kind"] == "error":
+            show_custom_message("Error", event["message"])
+        elif event["kind"] == "finished":
+            finished = event["status"]
+
+    if progress is not None and progress["total"]:
+        progress_bar.set(progress["done"] / progress["total"])
+        progress_text = f" row {progress['done']} of {progress['total']}"
+
+    if finished is None:
+        status_label.configure(text=f"{timer.current_phase.replace('_', ' ').capitalize()}{progress_text}: "
+                                    f"{timer.phase_elapsed():.1f}s (total {timer.elapsed():.1f}s)")
+        app.after(EVENT_POLL_MS, drain_run_events, timer, events, progress_text)
         return
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    chrome_driver_dir = os.path.join(script_dir, 'chromedriver-win64')
-    chrome_driver_path = os.path.join(chrome_driver_dir, 'chromedriver.exe')
-    user_data_dir = os.path.join(script_dir, 'User Data')
+    if finished == "ok":
+        progress_bar.set(1)
+    status_label.configure(text=f"Last run {timer.current_phase} in {timer.elapsed():.1f}s")
+    cancel_button.configure(state='disabled', text="Cancel")
+    enable_main_window_widgets()
+
+def cancel_run():
+    if run_events is not None:
+        run_events.cancel()
+        cancel_button.configure(state='disabled', text="Cancelling...")
+        status_label.configure(text="Cancelling after the current step...")
+
+def import_statement_file():
+    global imported_statement
+    if imported_statement is not None:
+        # A second click clears the import and goes back to the text areas
+        imported_statement = None
+        import_label.configure(text="Using the names and amounts typed above")
+        import_button.configure(text="Import CSV/XLSX")
+        names_text_area.configure(state='normal')
+        amounts_text_area.configure(state='normal')
+        return
 
-    chrome_options = Options()
-    chrome_options.add_argument(f"user-data-dir={user_data_dir}")
-    chrome_options.add_argument('profile-directory=Default')
-    chrome_options.add_argument("--window-size=1024,768")
+    path = filedialog.askopenfilename(parent=app, title="Import statement",
+                                      filetypes=[("Statement exports", "*.csv *.tsv *.txt *.xlsx *.xlsm"),
+                                                 ("All files", "*.*")])
+    if not path:
+        return
 
-    service = Service(chrome_driver_path)
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    wait = WebDriverWait(driver, 10)
+    disable_main_window_widgets()
+    import_label.configure(text="Reading file...")
+    outcome = {}
 
-    def run_script():
+    def load():
         try:
-            driver.get("https://app.ezlynx.com/applicantportal/Commissions/DirectBill/AddStatement")
-            wait_for_login(driver, wait)
-            driver.get('https://app.ezlynx.com/applicantportal/Commissions/DirectBill/AddStatement')
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, 'CarrierID')))
-            time.sleep(3)
-
-            select_closest_option(driver, 'CarrierID', desired_carrier)
-
-            # Fill out form fields
-            statement_number_input = driver.find_element(By.ID, 'StatementNumber')
-            statement_number_input.send_keys(statement_number)
-
-            statement_date_input = driver.find_element(By.ID, 'StatementDate')
-            formatted_date = datetime.now().strftime('%m/%d/%Y')
-            statement_date_input.send_keys(formatted_date)
-
-            today_btn = driver.find_element(By.CLASS_NAME, "ui-datepicker-current")
-            today_btn.click()
-
-            premium_input = driver.find_element(By.ID, 'Premium')
-            premium_input.send_keys('0')
-
-            commission_input = driver.find_element(By.ID, 'Commission')
-            commission_input.send_keys('0')
-
-            comment_textarea = driver.find_element(By.ID, 'Comment')
-            comment_textarea.send_keys(comment)
-
-            add_btn = driver.find_element(By.CSS_SELECTOR, "#AddStatementBtn")
-            add_btn.click()
-
-            time.sleep(7)
-
-            # Search and select
-            applicant_input = driver.find_element(By.CSS_SELECTOR, "#policySearchTerm")
-            applicant_input.send_keys("Gold Service Fee")
-            time.sleep(2)
-            applicant_input.send_keys(Keys.ARROW_DOWN)
-            time.sleep(2)
-            applicant_input.send_keys(Keys.ENTER)
-
-            add_team_btn = driver.find_element(By.CSS_SELECTOR, "#CommissionInfo > div:nth-child(2) > fieldset > div > div:nth-child(1) > h4 > button")
-            for _ in range(len(filtered_team_list)):
-                add_team_btn.click()
-
-            time.sleep(2)
-
-            # Select elements and fill in amounts
-            select_elements = driver.find_elements(By.CSS_SELECTOR, "#serviceTeamTable > tbody > tr:nth-child(n) > td:nth-child(1) > div > select")
-            if len(filtered_team_list) > len(select_elements):
-                print("Warning: There are more names in TeamList than select elements.")
-
-            for i in range(min(len(filtered_team_list), len(select_elements))):
-                name_to_check = filtered_team_list[i]
-                select = select_elements[i]
-                options = select.find_elements(By.TAG_NAME, 'option')
-                option_texts = [option.text.replace(" (Producer)", "").strip() for option in options]
-
-                if name_to_check in option_texts:
-                    options[option_texts.index(name_to_check)].click()
-                else:
-                    log_message = f"Name '{name_to_check}' not found in select element {i + 1}. Skipping.\n"
-                    print(log_message)
-
-            amount_elements = driver.find_elements(By.CSS_SELECTOR, "#serviceTeamTable > tbody > tr:nth-child(n) > td.input-append > input")
-            for i in range(min(len(filtered_amount_list), len(amount_elements))):
-                amount_input = amount_elements[i]
-                amount_value = filtered_amount_list[i]
-                amount_input.clear()
-                amount_input.send_keys(amount_value)
-
-            # Select transaction type
-            select_trans_type = driver.find_element(By.CSS_SELECTOR, "select[name='TransactionType']")
-            transaction_option = select_trans_type.find_element(By.CSS_SELECTOR, "option[value='PMT']")
-            transaction_option.click()
-
-            date_now_input = driver.find_element(By.ID, "TransactionDate")
-            date_now_input.click()
-            date_now_btn = driver.find_element(By.CLASS_NAME, "ui-datepicker-current")
-            date_now_btn.click()
-
-            prem_input = driver.find_element(By.ID, 'Premium')
-            comm_input = driver.find_element(By.NAME, 'CommissionAmount')
-
-            prem_input.clear()
-            prem_input.send_keys('0')
-
-            comm_input.clear()
-            comm_input.send_keys('0')
-
-            # Inject event listener (if applicable)
-            add_button = driver.find_element(By.CSS_SELECTOR, 'button.btn.btn-primary.ng-binding')
-            WebDriverWait(driver, 10).until(EC.visibility_of(add_button))
-            driver.execute_script("""
-                const addButton = document.querySelector('button.btn.btn-primary.ng-binding');
-                if (addButton) {
-                    addButton.addEventListener('click', () => {
-                        console.log('Add button clicked by user! Quitting WebDriver...');
-                        window.seleniumQuitTriggered = true;
-                    });
-                }
-            """)
-
-            while not driver.execute_script("return window.seleniumQuitTriggered"):
-                time.sleep(1)
-
-            print("Driver is quitting...")
-            time.sleep(1)
+            outcome["lines"] = load_statement_file(path)
+        except (StatementImportError, OSError) as e:
+            outcome["error"] = str(e)
+
+    loader = threading.Thread(target=load)
+    loader.start()
+    finish_statement_import(loader, outcome)
+
+def finish_statement_import(loader, outcome):
+    global imported_statement
+    # The file is parsed off the Tk thread; only this poller touches widgets
+    if loader.is_alive():
+        app.after(100, finish_statement_import, loader, outcome)
+        return
 
-        finally:
-            driver.quit()
-            enable_main_window_widgets()
+    enable_main_window_widgets()
+    if "error" in outcome:
+        import_label.configure(text="Import failed")
+        show_custom_message("Error", outcome["error"])
+        return
 
-    script_thread = threading.Thread(target=run_script)
-    script_thread.start()
+    imported_statement = outcome["lines"]
+    import_label.configure(text=f"{imported_statement['source']}: {imported_statement['count']} lines, "
+                                f"total {imported_statement['total']}, "
+                                f"{imported_statement['duplicateNames']} repeated names, "
+                                f"{imported_statement['duplicateLines']} identical lines")
+    import_button.configure(text="Clear Import")
+    names_text_area.configure(state='disabled')
+    amounts_text_area.configure(state='disabled')
 
 def open_settings():
     # Disable all relevant widgets in the main window
     disable_main_window_widgets()
 
+    load_automation()
+    from manual_import import get_settings_store
+    from settings_store import OVERRIDE_KEYS
+
     # Create the settings window
     settings_window = ctk.CTkToplevel(app)
     settings_window.title("Settings")
@@ -334,7 +365,7 @@ def open_settings():
     main_window_height = app.winfo_height()
 
     settings_window_width = 400
-    settings_window_height = 500
+    settings_window_height = 680
 
     settings_window_x = main_window_x + (main_window_width - settings_window_width) // 2
     settings_window_y = main_window_y + (main_window_height - settings_window_height) // 2
@@ -370,12 +401,20 @@ def open_settings():
 
         skip_names = skip_names_text.get("1.0", tk.END).strip().split('\n')
 
-        data = {
-            "nameMappings": mappings,
-            "skipList": skip_names
-        }
-        write_combined_json_file('combinedData.json', data)
-        show_custom_message("Info", "Settings Saved!")
+        # Overrides are checked first, so a bad one leaves the window open and nothing saved
+        try:
+            overrides = json.loads(overrides_text.get("1.0", tk.END).strip() or "{}")
+            if not isinstance(overrides, dict):
+                raise ValueError("overrides must be a JSON object")
+            overrides_changed, overrides_removed = settings_store.apply_overrides(overrides)
+        except ValueError as e:
+            show_custom_message("Error", f"Overrides not saved: {e}")
+            return
+
+        # Only the rules that were added, edited or deleted are written
+        changed, removed = settings_store.apply_edits(mappings, skip_names)
+        changed, removed = changed + overrides_changed, removed + overrides_removed
+        show_custom_message("Info", f"Settings Saved! {changed} changed, {removed} removed.")
         settings_saved[0] = True
         settings_window.destroy()
         enable_main_window_widgets()
@@ -414,13 +453,14 @@ def open_settings():
     settings_window.protocol("WM_DELETE_WINDOW", on_closing)
 
     # Create widgets for the settings window
-    current_data = read_combined_json_file('combinedData.json')
+    settings_store = get_settings_store()
     mappings_text = tk.Text(settings_window, height=10, width=40)
-    for item in current_data.get("nameMappings", []):
-        mappings_text.insert(tk.END, f"{item['original']} -> {item['mapped']}\n")
+    # One insert for the whole list; inserting per line is slow with thousands of rules
+    mappings_text.insert(tk.END, ''.join(f"{item['original']} -> {item['mapped']}\n"
+                                         for item in settings_store.mappings()))
 
     skip_names_text = tk.Text(settings_window, height=10, width=40)
-    skip_names_text.insert(tk.END, '\n'.join(current_data.get("skipList", [])))
+    skip_names_text.insert(tk.END, '\n'.join(settings_store.skip_list()))
 
     name_mappings_label = ctk.CTkLabel(settings_window, text="Name Mappings\n(Format: Original Name -> Mapped Name)")
     name_mappings_label.pack(padx=10, pady=(10, 5))
@@ -430,24 +470,32 @@ def open_settings():
     skip_list_label.pack(padx=10, pady=(10, 5))
     skip_names_text.pack(padx=10, pady=(0, 10))
 
+    overrides_text = tk.Text(settings_window, height=6, width=40)
+    overrides_text.insert(tk.END, json.dumps(settings_store.overrides(), indent=2))
+    overrides_label = ctk.CTkLabel(settings_window, text=f"Overrides (JSON)\n{', '.join(OVERRIDE_KEYS)}")
+    overrides_label.pack(padx=10, pady=(10, 5))
+    overrides_text.pack(padx=10, pady=(0, 10))
+
     save_button = ctk.CTkButton(settings_window, text="Save", command=save_settings)
     save_button.pack(pady=10)
 
 def disable_main_window_widgets():
-    widgets = [statement_number_entry, comment_entry, names_text_area, amounts_text_area, start_button, settings_button, carrier_name_entry]
+    widgets = [statement_number_entry, comment_entry, names_text_area, amounts_text_area, start_button, settings_button, carrier_name_entry, import_button, direct_submit_checkbox, aggregate_checkbox]
     for widget in widgets:
         if widget is not None:
             widget.configure(state='disabled')
 
 def enable_main_window_widgets():
-    widgets = [statement_number_entry, comment_entry, names_text_area, amounts_text_area, start_button, settings_button, carrier_name_entry]
+    widgets = [statement_number_entry, comment_entry, start_button, settings_button, carrier_name_entry, import_button, direct_submit_checkbox, aggregate_checkbox]
+    if imported_statement is None:
+        widgets += [names_text_area, amounts_text_area]
     for widget in widgets:
         if widget is not None:
             widget.configure(state='normal')
 
 app = ctk.CTk()
 app.title("Manual Import")
-app.geometry("600x500")
+app.geometry("600x600")
 
 ctk.set_appearance_mode("dark")
 
@@ -460,6 +508,9 @@ app.grid_rowconfigure(3, weight=0)
 app.grid_rowconfigure(4, weight=0)
 app.grid_rowconfigure(5, weight=1)
 app.grid_rowconfigure(6, weight=0)
+app.grid_rowconfigure(7, weight=0)
+app.grid_rowconfigure(8, weight=0)
+app.grid_rowconfigure(9, weight=0)
 
 carrier_name_label = ctk.CTkLabel(app, text="Carrier Name")
 carrier_name_label.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="ew")
@@ -468,6 +519,16 @@ carrier_name_entry = ctk.CTkEntry(app)
 carrier_name_entry.grid(row=1, column=0, padx=30, pady=(0, 10), sticky="ew")
 carrier_name_entry.insert(0, "Fortegra Specialty")
 
+# Sends the statement straight to EzLynx once one browser submission has taught the request
+direct_submit_var = ctk.BooleanVar(value=False)
+direct_submit_checkbox = ctk.CTkCheckBox(app, text="Submit over HTTP when possible", variable=direct_submit_var)
+direct_submit_checkbox.grid(row=0, column=1, padx=30, pady=(10, 0), sticky="w")
+
+# Sums repeated producers (after mappings and the skip list) into one row each
+aggregate_var = ctk.BooleanVar(value=False)
+aggregate_checkbox = ctk.CTkCheckBox(app, text="Combine repeated producers", variable=aggregate_var)
+aggregate_checkbox.grid(row=1, column=1, padx=30, pady=(0, 10), sticky="w")
+
 statement_number_label = ctk.CTkLabel(app, text="Statement Number")
 statement_number_label.grid(row=2, column=0, padx=10, pady=(10, 0), sticky="ew")
 
@@ -494,10 +555,37 @@ amounts_label.grid(row=4, column=1, padx=10, pady=(10, 0), sticky="n")
 amounts_text_area = ctk.CTkTextbox(app, height=15, width=40, wrap="word")
 amounts_text_area.grid(row=5, column=1, padx=30, pady=(0, 10), sticky="nsew")
 
+import_button = ctk.CTkButton(app, text="Import CSV/XLSX", command=import_statement_file)
+import_button.grid(row=6, column=0, padx=10, pady=(0, 10), sticky="ew")
+
+import_label = ctk.CTkLabel(app, text="Using the names and amounts typed above", wraplength=280)
+import_label.grid(row=6, column=1, padx=10, pady=(0, 10), sticky="ew")
+
 start_button = ctk.CTkButton(app, text="Start", command=start_script)
-start_button.grid(row=6, column=0, padx=10, pady=10, sticky="ew")
+start_button.grid(row=7, column=0, padx=10, pady=10, sticky="ew")
 
 settings_button = ctk.CTkButton(app, text="Settings", command=open_settings)
-settings_button.grid(row=6, column=1, padx=10, pady=10, sticky="ew")
+settings_button.grid(row=7, column=1, padx=10, pady=10, sticky="ew")
+
+progress_bar = ctk.CTkProgressBar(app)
+progress_bar.grid(row=8, column=0, columnspan=2, padx=30, pady=(0, 5), sticky="ew")
+progress_bar.set(0)
+
+status_label = ctk.CTkLabel(app, text="Idle")
+status_label.grid(row=9, column=0, padx=10, pady=(0, 10), sticky="ew")
+
+cancel_button = ctk.CTkButton(app, text="Cancel", command=cancel_run, state='disabled')
+cancel_button.grid(row=9, column=1, padx=10, pady=(0, 10), sticky="ew")
+
+def on_app_close():
+    if run_events is not None:
+        run_events.cancel()
+    if chrome_session is not None:
+        chrome_session.close()
+    app.destroy()
+
+app.protocol("WM_DELETE_WINDOW", on_app_close)
+
+app.after(200, prewarm_automation)
 
 app.mainloop()
@@ -0,0 +1,87 @@
+import os
+import queue
+import shutil
+import threading
+from chrome_session import ChromeSession
+from manual_import import SCRIPT_DIR, USER_DATA_DIR
+
+WORKER_PROFILES_DIR = os.path.join(SCRIPT_DIR, 'Worker Profiles')
+
+# Chrome locks a profile directory while it is open, so these must never be
+# copied into a worker profile. Caches are skipped to keep the copy small.
+PROFILE_COPY_IGNORE = shutil.ignore_patterns(
+    'SingletonLock', 'SingletonCookie', 'SingletonSocket', 'lockfile',
+    'Cache', 'Code Cache', 'GPUCache', 'ShaderCache', 'GrShaderCache',
+)
+
+def prepare_worker_profile(index, refresh=False):
+    """Copy the main User Data profile for a worker and return its path.
+
+    The copy is made once and reused on later runs; it is not kept in step
+    with User Data. Pass refresh to delete and copy it again, for example
+    after changing Chrome settings or extensions in the main profile.
+    """
+    profile_dir = os.path.join(WORKER_PROFILES_DIR, f'worker-{index}')
+    if refresh and os.path.exists(profile_dir):
+        print(f"Removing the old Chrome profile copy for worker {index}.")
+        shutil.rmtree(profile_dir)
+    if not os.path.exists(profile_dir):
+        print(f"Copying Chrome profile for worker {index}.")
+        shutil.copytree(USER_DATA_DIR, profile_dir, ignore=PROFILE_COPY_IGNORE)
+    return profile_dir
+
+def default_worker_count(statement_count):
+    return max(1, min(os.cpu_count() or 1, statement_count))
+
+def run_pool(statements, process_statement, workers, refresh_profiles=False):
+    """Run process_statement(session, statement, worker_index) for every statement.
+
+    Each worker thread owns its own ChromeSession and pulls the next statement
+    as soon as it is free. process_statement is expected to catch its own
+    errors and return a result dict; anything it lets escape is recorded as a
+    failure for that statement and the worker carries on. Results are returned
+    in the same order as statements. refresh_profiles rebuilds the worker
+    profile copies from User Data first.
+    """
+    pending = queue.Queue()
+    for index, statement in enumerate(statements):
+        pending.put((index, statement))
+
+    results = [None] * len(statements)
+
+    def worker(worker_index, user_data_dir):
+        session = ChromeSession(user_data_dir)
+        try:
+            while True:
+                try:
+                    index, statement = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    results[index] = process_statement(session, statement, worker_index)
+                except Exception as e:
+                    print(f"Worker {worker_index} failed on statement {statement['statement_number']}: {e}")
+                    results[index] = {
+                        "statement_number": statement["statement_number"],
+                        "carrier": statement["carrier"],
+                        "rows": 0,
+                        "elapsed": 0.0,
+                        "worker": worker_index,
+                        "status": f"failed: {e.__class__.__name__}",
+                    }
+        finally:
+            session.close()
+
+    if workers == 1:
+        profiles = [USER_DATA_DIR]
+    else:
+        profiles = [prepare_worker_profile(index, refresh_profiles) for index in range(1, workers + 1)]
+
+    threads = [threading.Thread(target=worker, args=(index, profile), name=f"worker-{index}")
+               for index, profile in enumerate(profiles, start=1)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results